@@ -82,9 +82,13 @@ async def graceful_shutdown():
         if whisper_service:
             await whisper_service.cleanup()
         
-        # Limpeza de arquivos temporários
-        if AUTO_CLEANUP_TEMP_FILES and youtube_service:
-            youtube_service.cleanup_temp_directory()
+        if youtube_service:
+            # Parar limpeza periódica no event loop (Task.cancel não é thread-safe)
+            await youtube_service.aclose()
+
+            # Limpeza de arquivos temporários
+            if AUTO_CLEANUP_TEMP_FILES:
+                await asyncio.to_thread(youtube_service.cleanup_temp_directory)
             
         logger.info("✅ Shutdown gracioso concluído")
         
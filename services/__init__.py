@@ -4,8 +4,14 @@ Serviços da aplicação
 Contém a lógica de negócio para download de vídeos, transcrição e gerenciamento de sessão persistente.
 """
 
-from .youtube_service import YouTubeService
+from .youtube_service import YouTubeService, YTDLStrategyError, YTDLCriticalError
 from .whisper_service import WhisperService
 from .persistent_session_manager import PersistentSessionManager
 
-__all__ = ["YouTubeService", "WhisperService", "PersistentSessionManager"]
+__all__ = [
+    "YouTubeService",
+    "YTDLStrategyError",
+    "YTDLCriticalError",
+    "WhisperService",
+    "PersistentSessionManager",
+]
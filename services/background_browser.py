@@ -9,6 +9,9 @@ from typing import Optional
 
 logger = logging.getLogger(__name__)
 
+# Domínios cujos cookies são salvos em cookies.txt
+COOKIE_DOMAINS = ('youtube.com', 'google.com')
+
 class BackgroundBrowser:
     """
     Navegador que roda em background independente da API
@@ -174,7 +177,7 @@ class BackgroundBrowser:
             # Filtrar apenas cookies do YouTube/Google
             youtube_cookies = [
                 c for c in cookies 
-                if any(domain in c.get('domain', '') for domain in ['youtube.com', 'google.com'])
+                if c.get('domain', '').endswith(COOKIE_DOMAINS)
             ]
             
             if not youtube_cookies:
@@ -4,11 +4,15 @@ import logging
 from pathlib import Path
 from typing import Optional, Dict, List
 from playwright.async_api import async_playwright, BrowserContext, Page, Browser
-from datetime import datetime
+from datetime import datetime, timedelta
 import random
+import time
 
 logger = logging.getLogger(__name__)
 
+# Domínios cujos cookies são salvos em cookies.txt
+COOKIE_DOMAINS = ('youtube.com', 'google.com')
+
 class PersistentSessionManager:
     """Gerenciador SIMPLES de sessão persistente - apenas Playwright puro"""
 
@@ -27,9 +31,16 @@ class PersistentSessionManager:
         # Status simples
         self.is_active = False
         self.session_start_time = None
-        self.last_activity = None
+        self._last_activity_ts: Optional[float] = None  # time.monotonic()
         self.refresh_count = 0
         
+        # Sinaliza fim da inicialização; status não depende de lock
+        self._ready = asyncio.Event()
+        
+        # Info da página em cache (atualizada por eventos, sem IPC no status)
+        self._last_url: Optional[str] = None
+        self._last_title: Optional[str] = None
+        
         # Debug port para conexão externa
         self.debug_port = 9222
         
@@ -135,6 +146,9 @@ class PersistentSessionManager:
                     # Se não há páginas, criar nova
                     self.page = await self.context.new_page()
                     logger.info("✅ Nova página criada")
+                
+                self._last_url = self.page.url
+                self.page.on("framenavigated", self._on_frame_navigated)
                     
             except Exception as e:
                 logger.error(f"❌ Erro ao obter página: {e}")
@@ -161,6 +175,7 @@ class PersistentSessionManager:
                     return False
             
             await asyncio.sleep(1)
+            await self._update_page_title()
             
             logger.info("💾 Salvando cookies...")
             await self._save_cookies()
@@ -168,7 +183,8 @@ class PersistentSessionManager:
             # Marcar como ativo
             self.is_active = True
             self.session_start_time = datetime.now()
-            self.last_activity = datetime.now()
+            self._last_activity_ts = time.monotonic()
+            self._ready.set()
             
             logger.info("✅ Sessão PERSISTENTE conectada!")
             logger.info(f"🌐 Chrome conectado via debug port {self.debug_port}")
@@ -182,6 +198,18 @@ class PersistentSessionManager:
             await self._cleanup()
             return False
 
+    def _on_frame_navigated(self, frame):
+        """Atualiza URL em cache quando o frame principal navega"""
+        if self.page and frame == self.page.main_frame:
+            self._last_url = frame.url
+
+    async def _update_page_title(self):
+        """Atualiza título em cache após uma navegação"""
+        try:
+            self._last_title = await self.page.title()
+        except Exception as e:
+            logger.debug(f"Erro ao obter título: {e}")
+
     async def _load_cookies(self):
         """Carregar cookies simples"""
         if not os.path.exists(self.cookie_filepath):
@@ -223,7 +251,7 @@ class PersistentSessionManager:
             # Filtrar apenas cookies do YouTube/Google
             youtube_cookies = [
                 c for c in cookies 
-                if any(domain in c.get('domain', '') for domain in ['youtube.com', 'google.com'])
+                if c.get('domain', '').endswith(COOKIE_DOMAINS)
             ]
             
             if not youtube_cookies:
@@ -263,6 +291,7 @@ class PersistentSessionManager:
             # Apenas recarregar o YouTube
             await self.page.goto("https://www.youtube.com", timeout=45000)
             await asyncio.sleep(2)
+            await self._update_page_title()
             
             # Movimento simples do mouse
             await self.page.mouse.move(500, 400)
@@ -272,7 +301,7 @@ class PersistentSessionManager:
             success = await self._save_cookies()
             
             if success:
-                self.last_activity = datetime.now()
+                self._last_activity_ts = time.monotonic()
                 self.refresh_count += 1
                 logger.info(f"✅ Refresh #{self.refresh_count} completo")
                 return True
@@ -302,12 +331,13 @@ class PersistentSessionManager:
             # Recarregar página
             await self.page.goto("https://www.youtube.com", timeout=60000)
             await asyncio.sleep(3)
+            await self._update_page_title()
             
             # Salvar novos cookies
             success = await self._save_cookies()
             
             if success:
-                self.last_activity = datetime.now()
+                self._last_activity_ts = time.monotonic()
                 self.refresh_count += 1
                 logger.info(f"✅ Force refresh #{self.refresh_count} completo")
                 return True
@@ -325,7 +355,7 @@ class PersistentSessionManager:
         try:
             await self.page.mouse.move(random.randint(100, 1800), random.randint(100, 900))
             await asyncio.sleep(0.5)
-            self.last_activity = datetime.now()
+            self._last_activity_ts = time.monotonic()
             return True
         except Exception as e:
             logger.debug(f"Erro no light refresh: {e}")
@@ -333,10 +363,16 @@ class PersistentSessionManager:
 
     async def get_session_status(self) -> Dict:
         """Status da sessão"""
+        last_activity = None
+        if self._last_activity_ts is not None:
+            # Converter timestamp monotônico para datetime apenas na emissão do status
+            age = time.monotonic() - self._last_activity_ts
+            last_activity = (datetime.now() - timedelta(seconds=age)).isoformat()
+        
         return {
             "is_active": self.is_active,
             "session_start_time": self.session_start_time.isoformat() if self.session_start_time else None,
-            "last_activity": self.last_activity.isoformat() if self.last_activity else None,
+            "last_activity": last_activity,
             "refresh_count": self.refresh_count,
             "debug_port": self.debug_port,
             "session_age_minutes": (
@@ -349,14 +385,12 @@ class PersistentSessionManager:
         """Status detalhado"""
         basic_status = await self.get_session_status()
         
-        try:
-            if self.page:
-                basic_status["page_info"] = {
-                    "url": await self.page.url(),
-                    "title": await self.page.title()
-                }
-        except Exception:
-            pass
+        # Valores em cache - nenhuma chamada ao Playwright por consulta
+        if self._ready.is_set() and self.page:
+            basic_status["page_info"] = {
+                "url": self._last_url,
+                "title": self._last_title
+            }
             
         return basic_status
 
@@ -380,6 +414,7 @@ class PersistentSessionManager:
                 self.playwright = None
                 
             self.is_active = False
+            self._ready.clear()
             logger.info("🧹 Recursos limpos")
             
         except Exception as e:
@@ -2,13 +2,84 @@ import os
 import asyncio
 import logging
 from pathlib import Path
+from contextlib import asynccontextmanager
 from typing import Optional, Dict, List
 from playwright.async_api import async_playwright, Browser, BrowserContext, Page
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 import time
+import random
+import hashlib
+import csv
 from datetime import datetime, timedelta
 
 logger = logging.getLogger(__name__)
 
+# Flags do Chromium que ainda alteram comportamento em versões atuais
+# (não incluir --user-data-dir aqui - vai em launch_persistent_context)
+BROWSER_ARGS = (
+    '--no-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-blink-features=AutomationControlled',
+    '--disable-gpu',
+    '--mute-audio',
+    '--no-first-run',
+    '--no-default-browser-check',
+    '--disable-background-timer-throttling',
+    '--disable-renderer-backgrounding',
+    '--disable-backgrounding-occluded-windows',
+    '--autoplay-policy=no-user-gesture-required',
+)
+
+# Scripts stealth concatenados, injetados pelo contexto em todo documento carregado
+STEALTH_SCRIPT = "\n".join((
+    # Remover webdriver property
+    """
+    Object.defineProperty(navigator, 'webdriver', {
+        get: () => undefined,
+    });
+    """,
+    # Mock chrome property
+    """
+    window.chrome = {
+        runtime: {},
+        app: {
+            isInstalled: false,
+        },
+    };
+    """,
+    # Mock plugins
+    """
+    Object.defineProperty(navigator, 'plugins', {
+        get: () => [1, 2, 3, 4, 5],
+    });
+    """,
+    # Mock languages
+    """
+    Object.defineProperty(navigator, 'languages', {
+        get: () => ['pt-BR', 'pt', 'en'],
+    });
+    """,
+))
+
+# Tempo máximo aguardando uma página livre do pool (segundos)
+PAGE_ACQUIRE_TIMEOUT = 30
+
+# Domínios cujos cookies são persistidos em cookies.txt
+COOKIE_DOMAINS = ('youtube.com', 'google.com', 'googlevideo.com')
+
+# Scroll suave, movimentos do mouse com jitter no lado JS e scroll de volta
+HUMAN_ACTIVITY_SCRIPT = """
+async (moves) => {
+    const sleep = (ms) => new Promise(r => setTimeout(r, ms));
+    window.scrollTo({top: 300, behavior: 'smooth'});
+    for (const [x, y, d] of moves) {
+        document.dispatchEvent(new MouseEvent('mousemove', {clientX: x, clientY: y, bubbles: true}));
+        await sleep(d);
+    }
+    window.scrollTo({top: 0, behavior: 'smooth'});
+}
+"""
+
 class PersistentSessionService:
     """Serviço para manter uma sessão persistente do YouTube com Playwright"""
 
@@ -19,7 +90,12 @@ class PersistentSessionService:
         # Componentes da sessão persistente
         self.playwright = None
         self.context: Optional[BrowserContext] = None  # Agora o context é o principal
-        self.page: Optional[Page] = None
+        self.page: Optional[Page] = None  # Página principal (navegação no YouTube)
+        
+        # Pool de páginas do mesmo contexto: health check e refresh não disputam a mesma página
+        self.page_pool_size = max(1, int(os.getenv("SESSION_PAGE_POOL_SIZE", "3")))
+        self._pages: List[Page] = []
+        self._page_pool: asyncio.Queue = asyncio.Queue()
         
         # Status da sessão
         self.is_active = False
@@ -27,18 +103,30 @@ class PersistentSessionService:
         self.session_start_time = None
         self.cookie_refresh_count = 0
         
+        # Hash dos últimos cookies gravados e (tamanho, mtime) do arquivo
+        # resultante: evita reescrever arquivo inalterado
+        self._last_cookie_hash: Optional[bytes] = None
+        self._last_cookie_stat: Optional[tuple] = None
+        
         # Configurações
         self.max_session_duration = timedelta(hours=12)  # Renovar sessão a cada 12h
         self.activity_timeout = timedelta(minutes=30)    # Timeout de inatividade
         
-        # Lock para operações concorrentes
+        # Lock para transições de estado (não é mantido durante navegação)
         self._lock = asyncio.Lock()
         
+        # Refresh em andamento; chamadores concorrentes aguardam o mesmo resultado
+        self._refresh_future: Optional[asyncio.Future] = None
+        
         # Criar diretório de perfil
         self.profile_dir.mkdir(exist_ok=True)
         
     async def initialize_session(self) -> bool:
         """Inicializa a sessão persistente do Playwright"""
+        # Fast path sem lock; confirmado novamente dentro do lock
+        if self.is_active:
+            return True
+            
         async with self._lock:
             if self.is_active:
                 logger.info("✅ Sessão já está ativa")
@@ -50,36 +138,11 @@ class PersistentSessionService:
                 # Inicializar Playwright
                 self.playwright = await async_playwright().start()
                 
-                # Configurações do navegador (sem --user-data-dir nos args)
-                browser_args = [
-                    '--no-sandbox',
-                    '--disable-setuid-sandbox',
-                    '--disable-dev-shm-usage',
-                    '--disable-gpu',
-                    '--disable-web-security',
-                    '--disable-features=VizDisplayCompositor',
-                    '--disable-blink-features=AutomationControlled',
-                    '--disable-extensions',
-                    '--no-first-run',
-                    '--disable-default-apps',
-                    '--disable-background-timer-throttling',
-                    '--disable-renderer-backgrounding',
-                    '--disable-backgrounding-occluded-windows',
-                    '--disable-client-side-phishing-detection',
-                    '--disable-sync',
-                    '--disable-translate',
-                    '--hide-scrollbars',
-                    '--mute-audio',
-                    '--no-zygote',
-                    '--disable-ipc-flooding-protection',
-                    # Não incluir --user-data-dir aqui!
-                ]
-                
                 # Usar launch_persistent_context em vez de launch + new_context
                 self.context = await self.playwright.chromium.launch_persistent_context(
                     user_data_dir=str(self.profile_dir),  # Aqui é o lugar correto
                     headless=True,
-                    args=browser_args,
+                    args=list(BROWSER_ARGS),
                     user_agent=(
                         "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
                         "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
@@ -99,18 +162,22 @@ class PersistentSessionService:
                     }
                 )
                 
+                # Scripts stealth aplicados uma vez no contexto (valem para todas
+                # as páginas e sobrevivem a reloads)
+                await self.context.add_init_script(STEALTH_SCRIPT)
+                
                 # Carregar cookies existentes se houver
                 await self._load_initial_cookies()
                 
                 # Criar página
                 self.page = await self.context.new_page()
                 
-                # Aplicar scripts stealth
-                await self._apply_stealth_scripts()
-                
                 # Navegar para YouTube e estabelecer sessão
                 await self._establish_youtube_session()
                 
+                # Popular pool de páginas (principal + auxiliares leves)
+                await self._populate_page_pool()
+                
                 # Marcar como ativa
                 self.is_active = True
                 self.session_start_time = datetime.now()
@@ -131,50 +198,41 @@ class PersistentSessionService:
             return
             
         try:
-            cookies = self._parse_netscape_cookies()
+            # I/O de arquivo em thread para não bloquear o event loop
+            cookies = await asyncio.to_thread(self._parse_netscape_cookies)
             if cookies:
                 await self.context.add_cookies(cookies)
                 logger.info(f"🍪 {len(cookies)} cookies iniciais carregados")
         except Exception as e:
             logger.warning(f"⚠️ Erro ao carregar cookies iniciais: {e}")
     
-    async def _apply_stealth_scripts(self):
-        """Aplica scripts para tornar o navegador mais stealth"""
-        stealth_scripts = [
-            # Remover webdriver property
-            """
-            Object.defineProperty(navigator, 'webdriver', {
-                get: () => undefined,
-            });
-            """,
-            # Mock chrome property
-            """
-            window.chrome = {
-                runtime: {},
-                app: {
-                    isInstalled: false,
-                },
-            };
-            """,
-            # Mock plugins
-            """
-            Object.defineProperty(navigator, 'plugins', {
-                get: () => [1, 2, 3, 4, 5],
-            });
-            """,
-            # Mock languages
-            """
-            Object.defineProperty(navigator, 'languages', {
-                get: () => ['pt-BR', 'pt', 'en'],
-            });
-            """,
-        ]
+    async def _populate_page_pool(self):
+        """Cria páginas auxiliares no mesmo contexto e coloca todas no pool"""
+        self._pages = [self.page]
+        for _ in range(self.page_pool_size - 1):
+            self._pages.append(await self.context.new_page())
         
-        for script in stealth_scripts:
-            try:
-                await self.page.evaluate(script)
-            except Exception as e:
-                logger.debug(f"Erro ao aplicar script stealth: {e}")
+        # Fila atual (criada na limpeza): quem já aguarda recebe as novas páginas
+        for page in self._pages:
+            self._page_pool.put_nowait(page)
+    
+    @asynccontextmanager
+    async def _acquire_page(self):
+        """Empresta uma página do pool, devolvendo-a ao final"""
+        # Fila capturada no empréstimo: a limpeza da sessão troca self._page_pool
+        pool = self._page_pool
+        async with asyncio.timeout(PAGE_ACQUIRE_TIMEOUT):
+            page = await pool.get()
+        if page is None:
+            # Pool encerrado: repassar o aviso para o próximo que estiver aguardando
+            pool.put_nowait(None)
+            raise RuntimeError("Pool de páginas encerrado")
+        try:
+            yield page
+        finally:
+            # Páginas de um contexto já fechado são descartadas
+            if pool is self._page_pool and not page.is_closed():
+                pool.put_nowait(page)
     
     async def _establish_youtube_session(self):
         """Estabelece sessão inicial no YouTube"""
@@ -184,8 +242,12 @@ class PersistentSessionService:
             # Navegar para YouTube
             await self.page.goto("https://www.youtube.com", timeout=60000, wait_until="domcontentloaded")
             
-            # Aguardar carregamento
-            await self.page.wait_for_timeout(3000)
+            # Aguardar o app renderizar o cabeçalho em vez de um sleep fixo
+            # (networkidle quase nunca ocorre: o YouTube mantém long-polls abertos)
+            try:
+                await self.page.wait_for_selector("ytd-masthead", timeout=3000)
+            except PlaywrightTimeoutError:
+                logger.debug("Cabeçalho do YouTube não apareceu em 3s, seguindo")
             
             # Fazer interações naturais para estabelecer sessão
             await self._simulate_human_activity()
@@ -202,60 +264,71 @@ class PersistentSessionService:
     async def _simulate_human_activity(self):
         """Simula atividade humana natural"""
         try:
-            # Scroll suave
-            await self.page.evaluate("window.scrollTo({top: 300, behavior: 'smooth'})")
-            await self.page.wait_for_timeout(1000)
-            
-            # Movimento do mouse
-            await self.page.mouse.move(400, 300)
+            # Scroll + movimentos do mouse despachados em um único evaluate
+            # (uma ida ao driver em vez de uma por movimento)
+            moves = [
+                (random.randint(100, 1820), random.randint(100, 980), random.randint(100, 300))
+                for _ in range(3)
+            ]
+            await self.page.evaluate(HUMAN_ACTIVITY_SCRIPT, moves)
             await self.page.wait_for_timeout(500)
-            await self.page.mouse.move(600, 400)
-            await self.page.wait_for_timeout(1000)
-            
-            # Scroll de volta
-            await self.page.evaluate("window.scrollTo({top: 0, behavior: 'smooth'})")
-            await self.page.wait_for_timeout(2000)
-            
-            # Pequeno movimento final
-            await self.page.mouse.move(500, 350)
-            await self.page.wait_for_timeout(1000)
             
         except Exception as e:
             logger.debug(f"Erro em atividade simulada: {e}")
     
     async def refresh_session_cookies(self) -> bool:
         """Atualiza os cookies da sessão ativa"""
+        # Lock apenas para transições de estado; a navegação acontece fora dele
         async with self._lock:
             if not self.is_active or not self.page:
                 logger.warning("⚠️ Sessão não está ativa para refresh")
                 return False
-                
-            try:
-                logger.info("🔄 Atualizando cookies da sessão ativa...")
-                
-                # Navegar novamente (refresh da página)
-                await self.page.reload(wait_until="domcontentloaded")
-                await self.page.wait_for_timeout(2000)
+            
+            pending = self._refresh_future
+            if pending is None:
+                future = asyncio.get_running_loop().create_future()
+                self._refresh_future = future
+        
+        if pending is not None:
+            # Outro chamador já está atualizando - reaproveitar o resultado dele
+            logger.info("⏳ Refresh já em andamento, aguardando resultado...")
+            return await asyncio.shield(pending)
+        
+        success = False
+        try:
+            logger.info("🔄 Atualizando cookies da sessão ativa...")
+            
+            async with self._acquire_page() as page:
+                # Navegar novamente (refresh da página, ou YouTube se for auxiliar)
+                if page.url.startswith("https://www.youtube.com"):
+                    await page.reload(wait_until="domcontentloaded")
+                else:
+                    await page.goto("https://www.youtube.com", timeout=60000, wait_until="domcontentloaded")
+                await page.wait_for_timeout(2000)
                 
                 # Atividade humana leve
-                await self.page.mouse.move(300, 300)
-                await self.page.wait_for_timeout(1000)
-                
-                # Extrair cookies atualizados
-                success = await self._extract_and_save_cookies()
-                
-                if success:
+                await page.mouse.move(300, 300)
+                await page.wait_for_timeout(1000)
+            
+            # Extrair cookies atualizados
+            success = await self._extract_and_save_cookies()
+            
+            if success:
+                async with self._lock:
                     self.last_activity = datetime.now()
                     self.cookie_refresh_count += 1
-                    logger.info(f"✅ Cookies atualizados (refresh #{self.cookie_refresh_count})")
-                    return True
-                else:
-                    logger.warning("⚠️ Falha ao atualizar cookies")
-                    return False
-                    
-            except Exception as e:
-                logger.error(f"❌ Erro ao atualizar cookies da sessão: {e}")
-                return False
+                logger.info(f"✅ Cookies atualizados (refresh #{self.cookie_refresh_count})")
+            else:
+                logger.warning("⚠️ Falha ao atualizar cookies")
+                
+        except Exception as e:
+            logger.error(f"❌ Erro ao atualizar cookies da sessão: {e}")
+            
+        finally:
+            self._refresh_future = None
+            future.set_result(success)
+            
+        return success
     
     async def _extract_and_save_cookies(self) -> bool:
         """Extrai cookies da sessão ativa e salva no arquivo"""
@@ -267,50 +340,60 @@ class PersistentSessionService:
                 logger.warning("⚠️ Nenhum cookie extraído da sessão")
                 return False
             
-            # Filtrar apenas cookies relevantes
-            filtered_cookies = [
-                cookie for cookie in cookies 
-                if any(domain in cookie.get('domain', '') 
-                       for domain in ['youtube.com', 'google.com', 'googlevideo.com'])
-            ]
+            # Filtrar e salvar no formato Netscape em uma única passada
+            saved_count = await asyncio.to_thread(self._write_netscape_cookies, cookies)
             
-            if not filtered_cookies:
+            if not saved_count:
                 logger.warning("⚠️ Nenhum cookie relevante encontrado")
                 return False
             
-            # Salvar no formato Netscape
-            self._write_netscape_cookies(filtered_cookies)
-            
-            logger.info(f"💾 {len(filtered_cookies)} cookies salvos da sessão ativa")
+            logger.info(f"💾 {saved_count} cookies salvos da sessão ativa")
             return True
             
         except Exception as e:
             logger.error(f"❌ Erro ao extrair/salvar cookies: {e}")
             return False
     
+    def _prefetch_cookie_file(self):
+        """Pede ao kernel para pré-carregar o arquivo de cookies (readahead)"""
+        if not hasattr(os, 'posix_fadvise'):
+            return
+        try:
+            fd = os.open(self.cookie_filepath, os.O_RDONLY)
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+            finally:
+                os.close(fd)
+        except OSError as e:
+            logger.debug(f"posix_fadvise indisponível: {e}")
+    
     def _parse_netscape_cookies(self) -> List[Dict]:
         """Parse cookies do formato Netscape"""
         cookies = []
         try:
-            with open(self.cookie_filepath, 'r', encoding='utf-8') as f:
-                for line in f:
-                    if line.strip().startswith('#') or not line.strip():
+            self._prefetch_cookie_file()
+            with open(self.cookie_filepath, 'r', encoding='utf-8', newline='') as f:
+                # csv.reader divide as linhas em C; QUOTE_NONE preserva aspas nos valores
+                reader = csv.reader(f, delimiter='\t', quoting=csv.QUOTE_NONE)
+                for row in reader:
+                    if len(row) != 7 or row[0].startswith('#'):
                         continue
                     
-                    parts = line.strip().split('\t')
-                    if len(parts) != 7:
+                    domain, _, path, secure, expires, name, value = row
+                    try:
+                        expires = int(expires)
+                    except ValueError:
+                        # Linha malformada: descartar só ela
                         continue
                     
-                    domain, include_subdomains, path, secure, expires, name, value = parts
-                    
                     cookies.append({
                         "name": name,
                         "value": value,
                         "domain": domain,
                         "path": path,
-                        "expires": int(expires) if expires != '0' else -1,
+                        "expires": expires if expires != 0 else -1,
                         "httpOnly": False,
-                        "secure": secure.lower() == 'true',
+                        "secure": secure in ('TRUE', 'true'),
                         "sameSite": "Lax"
                     })
                     
@@ -319,32 +402,75 @@ class PersistentSessionService:
             
         return cookies
     
-    def _write_netscape_cookies(self, cookies: List[Dict]):
-        """Escreve cookies no formato Netscape"""
+    def _write_netscape_cookies(self, cookies: List[Dict]) -> int:
+        """
+        Filtra e escreve cookies no formato Netscape em uma única passada
+        
+        Returns:
+            int: Quantidade de cookies relevantes (0 se nenhum)
+        """
+        lines = []
+        append = lines.append
+        for cookie in cookies:
+            g = cookie.get
+            domain = g('domain', '')
+            if not domain.endswith(COOKIE_DOMAINS):
+                continue
+            
+            expires = g('expires', -1)
+            append("\t".join((
+                domain,
+                "TRUE" if domain.startswith('.') else "FALSE",
+                g('path', '/'),
+                "TRUE" if g('secure', False) else "FALSE",
+                str(int(expires)) if expires != -1 else "0",
+                g('name', ''),
+                g('value', ''),
+            )) + "\n")
+        
+        count = len(lines)
+        if not count:
+            return 0
+        
+        # Pular escrita se os cookies não mudaram desde a última gravação e o
+        # arquivo ainda é o que foi gravado (não removido nem reescrito por outro)
+        cookie_hash = hashlib.blake2b("".join(lines).encode()).digest()
+        if cookie_hash == self._last_cookie_hash and self._cookie_file_stat() == self._last_cookie_stat:
+            logger.debug("🍪 Cookies inalterados, arquivo mantido")
+            return count
+        
+        header = (
+            "# Netscape HTTP Cookie File\n"
+            "# Gerado por sessão persistente\n"
+            f"# Atualizado: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+        )
+        tmp_path = f"{self.cookie_filepath}.tmp"
         try:
-            with open(self.cookie_filepath, 'w', encoding='utf-8') as f:
-                f.write("# Netscape HTTP Cookie File\n")
-                f.write("# Gerado por sessão persistente\n")
-                f.write(f"# Atualizado: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-                
-                for cookie in cookies:
-                    domain = cookie.get('domain', '')
-                    include_subdomains = "TRUE" if domain.startswith('.') else "FALSE"
-                    secure = "TRUE" if cookie.get('secure', False) else "FALSE"
-                    expires = int(cookie.get('expires', 0)) if cookie.get('expires', -1) != -1 else 0
-                    
-                    f.write(
-                        f"{domain}\t"
-                        f"{include_subdomains}\t"
-                        f"{cookie.get('path', '/')}\t"
-                        f"{secure}\t"
-                        f"{expires}\t"
-                        f"{cookie.get('name', '')}\t"
-                        f"{cookie.get('value', '')}\n"
-                    )
-                    
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(header)
+                f.writelines(lines)
+            # Leitores concorrentes (yt-dlp) nunca veem arquivo pela metade
+            os.replace(tmp_path, self.cookie_filepath)
         except Exception as e:
             logger.error(f"Erro ao escrever cookies: {e}")
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            return 0
+        
+        self._last_cookie_hash = cookie_hash
+        self._last_cookie_stat = self._cookie_file_stat()
+        
+        return count
+    
+    def _cookie_file_stat(self) -> Optional[tuple]:
+        """Retorna (tamanho, mtime) do arquivo de cookies, ou None se não existir"""
+        try:
+            st = os.stat(self.cookie_filepath)
+        except OSError:
+            return None
+        return st.st_size, st.st_mtime_ns
     
     async def health_check(self) -> bool:
         """Verifica se a sessão está saudável"""
@@ -352,8 +478,9 @@ class PersistentSessionService:
             return False
             
         try:
-            # Verificar se a página responde
-            await self.page.evaluate("document.title")
+            # Verificar se uma página livre do pool responde
+            async with self._acquire_page() as page:
+                await page.evaluate("document.title")
             
             # Verificar se não ultrapassou o tempo máximo de sessão
             if self.session_start_time:
@@ -380,14 +507,20 @@ class PersistentSessionService:
     async def _cleanup_session(self):
         """Limpa recursos da sessão"""
         try:
-            if self.page:
-                await self.page.close()
-                self.page = None
-                
-            if self.context:
-                await self.context.close()
-                self.context = None
+            # Fechar página e contexto em paralelo; erros de um não bloqueiam o outro
+            closers = [c.close() for c in (*self._pages, self.context) if c]
+            if self.page and self.page not in self._pages:
+                closers.append(self.page.close())
+            if closers:
+                await asyncio.gather(*closers, return_exceptions=True)
+            self.page = None
+            self._pages = []
+            # Acordar quem aguarda na fila antiga (as páginas dela foram fechadas)
+            self._page_pool.put_nowait(None)
+            self._page_pool = asyncio.Queue()
+            self.context = None
                 
+            # Playwright por último - encerra o socket do driver
             if self.playwright:
                 await self.playwright.stop()
                 self.playwright = None
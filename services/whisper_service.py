@@ -1,16 +1,81 @@
 import os
+import re
 import logging
 import httpx
-import aiofiles
 import asyncio
 import random
-import math
+import time
+import glob
+import hashlib
+import subprocess
+from collections import OrderedDict
 from typing import Optional, List, Tuple
-from pydub import AudioSegment
-from pydub.utils import make_chunks
+
+try:
+    # orjson é opcional: parse mais rápido direto dos bytes da resposta
+    from orjson import loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
 
 logger = logging.getLogger(__name__)
 
+# Status HTTP transitórios que valem nova tentativa (além de qualquer 5xx)
+RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+MAX_RETRY_DELAY = 30.0  # segundos (padrão de WHISPER_MAX_DELAY)
+MAX_RETRY_AFTER = 120.0  # segundos (padrão de WHISPER_MAX_RETRY_AFTER)
+MAX_UPLOAD_BYTES = 25 * 1024 * 1024  # Limite da API da OpenAI (25MB)
+
+# Padrões de erro da OpenAI compilados uma vez (sem .lower() do corpo inteiro)
+_ERR_CORRUPT_AUDIO = re.compile(r'something went wrong reading your request', re.IGNORECASE)
+_ERR_INVALID_REQUEST = re.compile(rb'invalid_request_error')
+
+# Assinaturas (offset, bytes) dos formatos de áudio aceitos pela OpenAI
+AUDIO_MAGIC_SIGNATURES = (
+    (0, b'ID3'),               # MP3 com tag ID3
+    (0, b'\xff\xfb'),          # MP3 (frame MPEG-1 Layer III)
+    (0, b'\xff\xf3'),          # MP3 (frame MPEG-2 Layer III)
+    (0, b'\xff\xf2'),          # MP3 (frame MPEG-2.5 Layer III)
+    (0, b'OggS'),              # OGG (Vorbis/Opus)
+    (0, b'fLaC'),              # FLAC
+    (0, b'RIFF'),              # WAV
+    (4, b'ftyp'),              # M4A/AAC/MP4
+    (0, b'\x1aE\xdf\xa3'),    # WebM/Matroska
+)
+
+# Extensão → muxer do ffmpeg para segmentar com cópia de stream (formatos aceitos
+# pela API); extensões fora da tabela caem no fallback com recodificação
+SEGMENT_FORMATS = {
+    '.mp3': 'mp3',
+    '.ogg': 'ogg',
+    '.oga': 'ogg',
+    '.m4a': 'ipod',
+    '.mp4': 'mp4',
+    '.wav': 'wav',
+    '.flac': 'flac',
+    '.webm': 'webm',
+}
+
+# Cliente HTTP compartilhado por todas as instâncias (um único pool de conexões/TLS)
+_SHARED_CLIENT: Optional[httpx.AsyncClient] = None
+_SHARED_CLIENT_REFS = 0
+
+def _get_client(timeout: float) -> httpx.AsyncClient:
+    """Retorna o cliente HTTP compartilhado, criando-o na primeira chamada"""
+    global _SHARED_CLIENT
+    if _SHARED_CLIENT is None or _SHARED_CLIENT.is_closed:
+        _SHARED_CLIENT = httpx.AsyncClient(
+            http2=True,
+            # Conexão rápida de falhar; leitura/escrita longas; sem timeout na fila do pool
+            timeout=httpx.Timeout(connect=10.0, read=timeout, write=timeout, pool=None),
+            # Manter conexões vivas entre transcrições espaçadas (padrão do httpx é 5s)
+            limits=httpx.Limits(
+                max_connections=int(os.getenv("WHISPER_MAX_CONN", "32")),
+                max_keepalive_connections=int(os.getenv("WHISPER_KEEPALIVE", "16")),
+                keepalive_expiry=60.0
+            )
+        )
+    return _SHARED_CLIENT
+
 class WhisperService:
     """Serviço para transcrição de áudio usando a API da OpenAI"""
 
@@ -23,17 +88,48 @@ class WhisperService:
         self.api_url = "https://api.openai.com/v1/audio/transcriptions"
         self.model = os.getenv("WHISPER_API_MODEL", "whisper-1")
 
+        # Headers e campos do formulário fixos, montados uma única vez
+        self._auth_headers = {"Authorization": f"Bearer {self.api_key}"}
+        self._base_data = {
+            'model': self.model,
+            # Sem 'language' para detecção automática do idioma original
+            'response_format': 'text'
+        }
+
         # Configurações de timeout e chunking
         self.request_timeout = float(os.getenv("WHISPER_TIMEOUT", "600.0"))  # 10 minutos
         self.max_duration_seconds = float(os.getenv("WHISPER_CHUNK_DURATION_SECONDS", "1500.0"))  # 25 minutos (1500s)
 
-        self.client = httpx.AsyncClient(
-            timeout=self.request_timeout,
-            limits=httpx.Limits(max_connections=10, max_keepalive_connections=5)
-        )
+        global _SHARED_CLIENT_REFS
+        self.client = _get_client(self.request_timeout)
+        _SHARED_CLIENT_REFS += 1
+
+        # Limites de upload: concorrência e bytes em voo (enfileirados + enviando)
+        self.max_concurrent_uploads = int(os.getenv("WHISPER_MAX_CONCURRENT_UPLOADS", "4"))
+        self.max_inflight_bytes = int(float(os.getenv("WHISPER_MAX_INFLIGHT_MB", "200")) * 1024 * 1024)
+        self._upload_semaphore = asyncio.Semaphore(self.max_concurrent_uploads)
+        self._inflight_bytes = 0
+
+        # Chunks de um mesmo áudio transcritos em paralelo
+        self.chunk_concurrency = int(os.getenv("WHISPER_CHUNK_CONCURRENCY", "4"))
+
+        # Tasks de limpeza de arquivos em andamento
+        self._cleanup_tasks: set = set()
 
         self.max_retries = int(os.getenv("WHISPER_MAX_RETRIES", "3"))
         self.base_delay = float(os.getenv("WHISPER_RETRY_DELAY", "2.0"))
+        self.max_delay = float(os.getenv("WHISPER_MAX_DELAY", str(MAX_RETRY_DELAY)))
+        # Teto para o Retry-After do servidor: a espera segura semáforo e bytes em voo
+        self.max_retry_after = float(os.getenv("WHISPER_MAX_RETRY_AFTER", str(MAX_RETRY_AFTER)))
+
+        # Cache LRU de transcrições indexado por (sha256 do áudio, modelo); 0 desativa
+        self.cache_size = int(os.getenv("WHISPER_CACHE_SIZE", "256"))
+        self._transcription_cache: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+
+        # Cache do health check (evita round-trip HTTPS a cada probe)
+        self.health_check_ttl = 30.0  # segundos
+        self._last_health_ok = False
+        self._last_health_ts: Optional[float] = None
 
         logger.info(f"🎤 WhisperService inicializado (modelo: {self.model}, max_retries: {self.max_retries}, timeout: {self.request_timeout}s, chunk_duration: {self.max_duration_seconds}s)")
 
@@ -45,18 +141,76 @@ class WhisperService:
             float: Duração em segundos
         """
         try:
-            audio = AudioSegment.from_file(audio_path)
-            duration_seconds = len(audio) / 1000.0  # pydub retorna em ms
-            logger.info(f"🕒 Duração do áudio: {duration_seconds:.2f} segundos ({duration_seconds/60:.2f} minutos)")
-            return duration_seconds
+            # ffprobe lê apenas os metadados do container, sem decodificar o áudio
+            result = subprocess.run(
+                ["ffprobe", "-v", "error", "-show_entries", "format=duration",
+                 "-of", "default=nw=1:nk=1", audio_path],
+                capture_output=True, text=True, timeout=30
+            )
+            duration_seconds = float(result.stdout.strip())
         except Exception as e:
-            logger.warning(f"⚠️ Erro ao detectar duração do áudio: {e}")
-            return 0.0
+            logger.warning(f"⚠️ ffprobe não obteve a duração ({e}), decodificando com pydub...")
+            try:
+                from pydub import AudioSegment  # Import tardio: só no fallback
+                audio = AudioSegment.from_file(audio_path)
+                duration_seconds = len(audio) / 1000.0  # pydub retorna em ms
+            except Exception as e:
+                logger.warning(f"⚠️ Erro ao detectar duração do áudio: {e}")
+                return 0.0
 
-    def _split_audio_by_duration(self, audio_path: str, max_duration_seconds: float) -> List[str]:
+        logger.info(f"🕒 Duração do áudio: {duration_seconds:.2f} segundos ({duration_seconds/60:.2f} minutos)")
+        return duration_seconds
+
+    def _split_audio_by_duration(self, audio_path: str, max_duration_seconds: float,
+                                 duration_seconds: Optional[float] = None) -> List[str]:
         """
         Divide o áudio em chunks baseado na duração
 
+        Args:
+            audio_path: Caminho do arquivo de áudio
+            max_duration_seconds: Duração máxima por chunk em segundos
+            duration_seconds: Duração já conhecida (evita decodificar só para medir)
+
+        Returns:
+            List[str]: Lista de caminhos dos arquivos de chunk
+        """
+        if duration_seconds and duration_seconds <= max_duration_seconds:
+            logger.info(f"🔊 Áudio não precisa ser dividido ({duration_seconds:.2f}s / {duration_seconds/60:.2f}min)")
+            return [audio_path]
+
+        base_name, ext = os.path.splitext(audio_path)
+        ext = ext.lower()
+        segment_format = SEGMENT_FORMATS.get(ext)
+        if segment_format is None:
+            logger.info(f"🔁 Formato '{ext or '?'}' sem segmentação por cópia, recodificando com pydub...")
+            return self._split_audio_with_pydub(audio_path, max_duration_seconds)
+
+        try:
+            # Segmentação por cópia de stream: corta nos limites de pacote do
+            # container, sem decodificar nem recodificar o áudio
+            subprocess.run(
+                ["ffmpeg", "-v", "error", "-y", "-i", audio_path,
+                 "-f", "segment", "-segment_format", segment_format,
+                 "-segment_time", str(int(max_duration_seconds)),
+                 "-c", "copy", "-reset_timestamps", "1",
+                 f"{base_name}_chunk_%02d{ext}"],
+                capture_output=True, check=True, timeout=300
+            )
+            chunk_paths = sorted(glob.glob(f"{glob.escape(base_name)}_chunk_*{ext}"))
+            if chunk_paths:
+                logger.info(f"✂️ Áudio dividido em {len(chunk_paths)} chunks de ~{max_duration_seconds}s ({max_duration_seconds/60:.2f}min) sem recodificação")
+                return chunk_paths
+        except Exception as e:
+            logger.warning(f"⚠️ Segmentação por cópia falhou ({e}), recodificando com pydub...")
+            # Descartar segmentos parciais antes do fallback
+            self._cleanup_audio_files(glob.glob(f"{glob.escape(base_name)}_chunk_*{ext}"))
+
+        return self._split_audio_with_pydub(audio_path, max_duration_seconds)
+
+    def _split_audio_with_pydub(self, audio_path: str, max_duration_seconds: float) -> List[str]:
+        """
+        Divide o áudio decodificando com pydub e recodificando cada chunk em OGG
+
         Args:
             audio_path: Caminho do arquivo de áudio
             max_duration_seconds: Duração máxima por chunk em segundos
@@ -65,6 +219,7 @@ class WhisperService:
             List[str]: Lista de caminhos dos arquivos de chunk
         """
         try:
+            from pydub import AudioSegment  # Import tardio: só no fallback
             audio = AudioSegment.from_file(audio_path)
             total_duration_ms = len(audio)
             max_duration_ms = int(max_duration_seconds * 1000)  # Converter para ms
@@ -78,12 +233,11 @@ class WhisperService:
                 return [audio_path]
 
             # Calcular número de chunks necessários
-            num_chunks = math.ceil(total_duration_ms / max_duration_ms)
+            num_chunks = -(-total_duration_ms // max_duration_ms)  # Teto em aritmética inteira
             logger.info(f"✂️ Dividindo áudio em {num_chunks} chunks de ~{max_duration_seconds}s ({max_duration_seconds/60:.2f}min)")
 
-            for i in range(num_chunks):
-                start_time = i * max_duration_ms
-                end_time = min((i + 1) * max_duration_ms, total_duration_ms)
+            for i, start_time in enumerate(range(0, total_duration_ms, max_duration_ms)):
+                end_time = min(start_time + max_duration_ms, total_duration_ms)
 
                 chunk = audio[start_time:end_time]
                 chunk_path = f"{base_name}_chunk_{i+1:02d}.ogg"
@@ -109,29 +263,31 @@ class WhisperService:
         Returns:
             tuple: (is_valid, error_message)
         """
-        if not os.path.exists(audio_path):
-            return False, f"Arquivo não encontrado: {audio_path}"
-
         try:
-            file_size = os.path.getsize(audio_path)
-            if file_size == 0:
-                return False, "Arquivo de áudio está vazio"
+            # Uma única abertura: fstat() cobre existência e tamanho, e o
+            # mesmo handle é usado para ler o header
+            try:
+                f = open(audio_path, 'rb')
+            except FileNotFoundError:
+                return False, f"Arquivo não encontrado: {audio_path}"
+
+            with f:
+                file_size = os.fstat(f.fileno()).st_size
+                if file_size == 0:
+                    return False, "Arquivo de áudio está vazio"
 
-            # OpenAI limite: 25MB (mas vamos permitir pois faremos chunking)
-            max_size = 25 * 1024 * 1024  # 25MB
-            if file_size > max_size:
-                logger.warning(f"⚠️ Arquivo grande ({file_size / (1024*1024):.2f}MB), mas será dividido em chunks")
+                # OpenAI limite: 25MB (mas vamos permitir pois faremos chunking)
+                max_size = 25 * 1024 * 1024  # 25MB
+                if file_size > max_size:
+                    logger.warning(f"⚠️ Arquivo grande ({file_size / (1024*1024):.2f}MB), mas será dividido em chunks")
 
-            # Verificar se é um arquivo de áudio válido (básico)
-            with open(audio_path, 'rb') as f:
+                # Verificar se é um arquivo de áudio válido (básico)
                 header = f.read(12)
                 if len(header) < 12:
                     return False, "Arquivo corrompido ou muito pequeno"
 
-                # Verificar alguns headers comuns de áudio
-                if not (header.startswith(b'ID3') or  # MP3
-                       header[8:12] == b'WAVE' or    # WAV
-                       header[4:8] == b'ftyp'):      # M4A/AAC
+                # Verificar assinaturas conhecidas de áudio (tabela)
+                if not any(header.startswith(sig, offset) for offset, sig in AUDIO_MAGIC_SIGNATURES):
                     logger.warning(f"⚠️ Formato de áudio não reconhecido, tentando envio mesmo assim")
 
             return True, ""
@@ -141,34 +297,50 @@ class WhisperService:
 
     async def _make_transcription_request(self, audio_path: str, headers: dict, data: dict, files: dict) -> httpx.Response:
         """
-        Faz requisição para API da OpenAI com retry em caso de erro 500
+        Faz requisição para API da OpenAI com retry em erros transitórios (408, 429, 5xx)
         """
         last_exception = None
+        retry_after = 0.0
+
+        # Request montado uma única vez: boundary e cabeçalhos do multipart
+        # são reaproveitados nas novas tentativas; o httpx rebobina o handle
+        # do arquivo (seek(0)) ao reenviar, sem copiar o áudio para a memória
+        request = self.client.build_request(
+            "POST",
+            self.api_url,
+            headers=headers,
+            data=data,
+            files=files
+        )
 
         for attempt in range(self.max_retries + 1):
             try:
                 if attempt > 0:
-                    delay = self.base_delay * (2 ** (attempt - 1)) + random.uniform(0, 1)
+                    # Full jitter: evita que vários workers repitam em sincronia
+                    delay = random.uniform(0, min(self.base_delay * (2 ** (attempt - 1)), self.max_delay))
+                    delay = max(delay, retry_after)
                     logger.info(f"🔄 Tentativa {attempt + 1}/{self.max_retries + 1} após {delay:.1f}s...")
                     await asyncio.sleep(delay)
+                    retry_after = 0.0
 
-                response = await self.client.post(
-                    self.api_url,
-                    headers=headers,
-                    data=data,
-                    files=files
-                )
+                # Modo stream: o corpo só é lido quando a resposta será usada
+                response = await self.client.send(request, stream=True)
 
-                # Se sucesso ou erro não-retriável, retorna
-                if response.status_code == 200 or response.status_code in [400, 401, 413, 429]:
+                # Se sucesso ou erro não-retriável (400, 401, 413...), retorna
+                if response.status_code == 200 or not (
+                    response.status_code in RETRYABLE_STATUS_CODES or response.status_code >= 500
+                ):
+                    await response.aread()
                     return response
 
-                # Erro 500+ são retriáveis
-                if response.status_code >= 500:
-                    logger.warning(f"⚠️ Erro {response.status_code} da OpenAI (tentativa {attempt + 1})")
-                    if attempt < self.max_retries:
-                        continue
+                logger.warning(f"⚠️ Erro {response.status_code} da OpenAI (tentativa {attempt + 1})")
+                if attempt < self.max_retries:
+                    retry_after = min(self._parse_retry_after(response), self.max_retry_after)
+                    # Descartar página de erro sem bufferizar o corpo
+                    await response.aclose()
+                    continue
 
+                await response.aread()
                 return response
 
             except (httpx.TimeoutException, httpx.ConnectError) as e:
@@ -186,6 +358,17 @@ class WhisperService:
 
         return response
 
+    @staticmethod
+    def _parse_retry_after(response: httpx.Response) -> float:
+        """Lê o header Retry-After (em segundos); 0 se ausente ou inválido"""
+        value = response.headers.get("Retry-After")
+        if not value:
+            return 0.0
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return 0.0
+
     async def _transcribe_single_file(self, audio_path: str) -> str:
         """
         Transcreve um único arquivo de áudio via API OpenAI
@@ -199,25 +382,34 @@ class WhisperService:
         Raises:
             Exception: Se houver erro na transcrição
         """
-        file_size = os.path.getsize(audio_path) / (1024 * 1024)  # MB
-        logger.info(f"📤 Enviando arquivo para OpenAI ({file_size:.2f}MB)...")
+        headers = self._auth_headers
+        data = self._base_data
 
-        headers = {
-            "Authorization": f"Bearer {self.api_key}"
-        }
-        
+        # Tamanho verificado antes de abrir: acima de 25MB a API responderia 413
+        file_size_bytes = os.stat(audio_path).st_size
+        if file_size_bytes > MAX_UPLOAD_BYTES:
+            raise Exception("Arquivo de áudio muito grande para a API da OpenAI (limite: 25MB).")
+
+        # Backpressure: recusar em vez de enfileirar bytes além do limite
+        if self._inflight_bytes + file_size_bytes > self.max_inflight_bytes:
+            raise Exception("Limite de uploads simultâneos atingido. Tente novamente em instantes.")
+
+        self._inflight_bytes += file_size_bytes
         try:
-            # Ler arquivo de forma assíncrona
-            async with aiofiles.open(audio_path, 'rb') as audio_file:
-                audio_content = await audio_file.read()
-                
+            await self._upload_semaphore.acquire()
+        except BaseException:
+            self._inflight_bytes -= file_size_bytes
+            raise
+
+        try:
+            # Passar o handle do arquivo para o httpx: o corpo multipart é
+            # transmitido em blocos, sem carregar o áudio inteiro na memória
+            with open(audio_path, 'rb') as audio_file:
+                file_size = file_size_bytes / (1024 * 1024)  # MB
+                logger.info(f"📤 Enviando arquivo para OpenAI ({file_size:.2f}MB)...")
+
                 files = {
-                    'file': (os.path.basename(audio_path), audio_content, 'audio/mpeg')
-                }
-                data = {
-                    'model': self.model,
-                    # Remover 'language' para detecção automática do idioma original
-                    'response_format': 'text'
+                    'file': (os.path.basename(audio_path), audio_file, 'audio/mpeg')
                 }
                 
                 # Fazer requisição à API com retry
@@ -226,31 +418,13 @@ class WhisperService:
                 
                 # Verificar se a resposta foi bem-sucedida
                 response.raise_for_status()
-                
-                # Debug: verificar conteúdo da resposta
-                logger.debug(f"Response status: {response.status_code}")
-                logger.debug(f"Response headers: {dict(response.headers)}")
-                logger.debug(f"Response content: {response.text[:200]}...")
-                
-                # Para response_format='text', a resposta é diretamente o texto
-                logger.debug(f"Model: '{self.model}', Response format: '{data.get('response_format')}'")
-                
-                if data.get('response_format') == 'text':
-                    # Resposta é texto puro
-                    transcription = response.text.strip()
-                    logger.info(f"📝 Recebido texto da OpenAI: {len(transcription)} caracteres")
-                    if not transcription:
-                        logger.warning("⚠️ OpenAI retornou texto vazio")
-                        return ""
-                else:
-                    # Fallback para formato JSON
-                    try:
-                        result = response.json()
-                        transcription = result.get('text', '').strip()
-                    except ValueError as json_error:
-                        logger.error(f"❌ Erro ao parsear JSON da OpenAI: {json_error}")
-                        logger.error(f"Response content: {response.text[:200]}...")
-                        return ""
+
+                # response_format='text': o corpo é o próprio texto, sempre UTF-8
+                # (decodificado direto, sem a detecção de charset de response.text)
+                transcription = response.content.decode("utf-8", errors="replace").strip()
+                if not transcription:
+                    logger.warning("⚠️ OpenAI retornou texto vazio")
+                    return ""
 
                 char_count = len(transcription)
                 logger.info(f"✅ Transcrição concluída ({char_count} caracteres)")
@@ -261,11 +435,11 @@ class WhisperService:
             error_details = ""
             error_message = ""
             try:
-                error_details = e.response.text
+                error_details = e.response.content.decode("utf-8", errors="replace")
                 # Tentar extrair mensagem de erro do JSON
                 if error_details:
                     try:
-                        error_json = e.response.json()
+                        error_json = _json_loads(e.response.content)
                         if "error" in error_json and "message" in error_json["error"]:
                             error_message = error_json["error"]["message"]
                     except:
@@ -278,9 +452,9 @@ class WhisperService:
 
             # Tratamento específico por código de erro
             if e.response.status_code == 400:
-                if "something went wrong reading your request" in error_message.lower():
+                if _ERR_CORRUPT_AUDIO.search(error_message):
                     raise Exception("Arquivo de áudio corrompido ou formato inválido. Tente converter o arquivo para MP3.")
-                elif "invalid_request_error" in error_details:
+                elif _ERR_INVALID_REQUEST.search(e.response.content):
                     raise Exception(f"Parâmetros inválidos na requisição: {error_message or 'Verifique o formato do arquivo'}")
                 else:
                     raise Exception(f"Requisição inválida para OpenAI: {error_message or error_details}")
@@ -309,6 +483,10 @@ class WhisperService:
             logger.error(f"❌ Erro inesperado na transcrição: {str(e)}")
             raise Exception(f"Falha na transcrição: {str(e)}")
 
+        finally:
+            self._upload_semaphore.release()
+            self._inflight_bytes -= file_size_bytes
+
     async def transcribe(self, audio_path: str) -> str:
         """
         Transcreve arquivo de áudio via API OpenAI com suporte a chunking para arquivos longos
@@ -325,82 +503,143 @@ class WhisperService:
         chunk_files = []
         try:
             # Validar arquivo antes do envio
-            is_valid, error_msg = self._validate_audio_file(audio_path)
+            is_valid, error_msg = await asyncio.to_thread(self._validate_audio_file, audio_path)
             if not is_valid:
                 logger.error(f"❌ Validação falhou: {error_msg}")
                 raise ValueError(f"Arquivo inválido: {error_msg}")
 
-            # Verificar duração do áudio
-            duration_seconds = self._get_audio_duration(audio_path)
+            # Cache por conteúdo: mesmo áudio + mesmo modelo = mesma transcrição
+            cache_key = None
+            if self.cache_size > 0:
+                # Hash em thread: hashlib libera o GIL e o loop segue atendendo
+                digest = await asyncio.to_thread(self._sha256_file, audio_path)
+                cache_key = (digest, self.model)
+                cached = self._transcription_cache.get(cache_key)
+                if cached is not None:
+                    self._transcription_cache.move_to_end(cache_key)
+                    logger.info(f"♻️ Transcrição encontrada em cache ({len(cached)} caracteres)")
+                    return cached
+
+            # Verificar duração do áudio (ffprobe/ffmpeg em thread, fora do event loop)
+            duration_seconds = await asyncio.to_thread(self._get_audio_duration, audio_path)
 
             # Se a duração é maior que o limite, dividir em chunks
             if duration_seconds > self.max_duration_seconds:
                 logger.info(f"🔴 Áudio longo detectado ({duration_seconds:.2f}s ({duration_seconds/60:.2f}min) > {self.max_duration_seconds}s ({self.max_duration_seconds/60:.2f}min))")
                 logger.info(f"✂️ Dividindo em chunks de {self.max_duration_seconds}s ({self.max_duration_seconds/60:.2f}min)...")
 
-                chunk_files = self._split_audio_by_duration(audio_path, self.max_duration_seconds)
+                chunk_files = await asyncio.to_thread(
+                    self._split_audio_by_duration, audio_path, self.max_duration_seconds, duration_seconds
+                )
 
                 if len(chunk_files) == 1:
                     # Não foi dividido, usar arquivo original
                     logger.info("🔊 Usando arquivo original (chunk único)")
                     transcription = await self._transcribe_single_file(audio_path)
                 else:
-                    # Transcrever cada chunk e concatenar
-                    logger.info(f"📋 Transcrevendo {len(chunk_files)} chunks...")
-                    transcriptions = []
+                    # Transcrever chunks em paralelo (limitado) e concatenar em ordem
+                    logger.info(f"📋 Transcrevendo {len(chunk_files)} chunks (até {self.chunk_concurrency} em paralelo)...")
+                    semaphore = asyncio.Semaphore(self.chunk_concurrency)
 
-                    for i, chunk_path in enumerate(chunk_files, 1):
-                        logger.info(f"🎤 Transcrevendo chunk {i}/{len(chunk_files)}...")
-                        chunk_transcription = await self._transcribe_single_file(chunk_path)
+                    async def transcribe_chunk(i: int, chunk_path: str) -> str:
+                        async with semaphore:
+                            logger.info(f"🎤 Transcrevendo chunk {i}/{len(chunk_files)}...")
+                            chunk_transcription = (await self._transcribe_single_file(chunk_path)).strip()
 
-                        if chunk_transcription.strip():
-                            transcriptions.append(chunk_transcription.strip())
+                        if chunk_transcription:
                             logger.info(f"✅ Chunk {i} transcrito ({len(chunk_transcription)} caracteres)")
                         else:
                             logger.warning(f"⚠️ Chunk {i} retornou transcrição vazia")
+                        return chunk_transcription
 
-                    # Concatenar todas as transcrições
-                    transcription = " ".join(transcriptions)
+                    tasks = [
+                        asyncio.create_task(transcribe_chunk(i, chunk_path))
+                        for i, chunk_path in enumerate(chunk_files, 1)
+                    ]
+                    try:
+                        # gather preserva a ordem dos chunks nos resultados
+                        results = await asyncio.gather(*tasks)
+                    except BaseException:
+                        # Falha (ou cancelamento) em um chunk: cancelar e aguardar os demais
+                        # antes do finally apagar os arquivos que ainda estão sendo enviados
+                        for task in tasks:
+                            task.cancel()
+                        await asyncio.gather(*tasks, return_exceptions=True)
+                        raise
+
+                    # Concatenar todas as transcrições (já sem espaços; ignora vazias)
+                    transcription = " ".join(t for t in results if t)
                     logger.info(f"🔗 Transcrições concatenadas ({len(transcription)} caracteres total)")
             else:
                 # Áudio dentro do limite, transcrever diretamente
                 logger.info(f"🔊 Áudio dentro do limite ({duration_seconds:.2f}s / {duration_seconds/60:.2f}min)")
                 transcription = await self._transcribe_single_file(audio_path)
 
+            if cache_key is not None:
+                self._transcription_cache[cache_key] = transcription
+                if len(self._transcription_cache) > self.cache_size:
+                    self._transcription_cache.popitem(last=False)
+
             return transcription
 
         finally:
-            # Limpar arquivo original
-            self._cleanup_audio_file(audio_path)
+            # Limpar arquivo original e chunks em background (fora do event loop),
+            # sem atrasar a resposta; dict.fromkeys remove o original duplicado
+            self._schedule_cleanup(list(dict.fromkeys([audio_path, *chunk_files])))
+
+    @staticmethod
+    def _sha256_file(audio_path: str) -> str:
+        """Calcula SHA-256 do arquivo (hashlib.file_digest, via OpenSSL)"""
+        with open(audio_path, 'rb') as f:
+            return hashlib.file_digest(f, 'sha256').hexdigest()
+
+    def _schedule_cleanup(self, paths: List[str]):
+        """Agenda remoção dos arquivos em threads paralelas (fire-and-forget)"""
+        task = asyncio.gather(
+            *(asyncio.to_thread(self._cleanup_audio_file, path) for path in paths),
+            return_exceptions=True
+        )
+        # Manter referência até concluir para a task não ser coletada pelo GC
+        self._cleanup_tasks.add(task)
+        task.add_done_callback(self._cleanup_tasks.discard)
 
-            # Limpar arquivos de chunk
-            for chunk_file in chunk_files:
-                if chunk_file != audio_path:  # Não remover o arquivo original duas vezes
-                    self._cleanup_audio_file(chunk_file)
+    def _cleanup_audio_files(self, paths: List[str]):
+        """Remove lista de arquivos de áudio (executado em thread)"""
+        for path in paths:
+            self._cleanup_audio_file(path)
 
     def _cleanup_audio_file(self, audio_path: str):
         """Remove arquivo de áudio após processamento"""
         try:
-            if os.path.exists(audio_path):
-                os.remove(audio_path)
-                logger.info(f"🗑️ Arquivo removido: {os.path.basename(audio_path)}")
+            os.remove(audio_path)
+            logger.info(f"🗑️ Arquivo removido: {os.path.basename(audio_path)}")
+        except FileNotFoundError:
+            pass
         except Exception as e:
             logger.warning(f"⚠️ Erro ao remover arquivo: {str(e)}")
 
     async def health_check(self) -> bool:
-        """Verifica se a API está acessível"""
+        """Verifica se a API está acessível (resultado em cache por health_check_ttl)"""
+        now = time.monotonic()
+        if self._last_health_ts is not None and now - self._last_health_ts < self.health_check_ttl:
+            return self._last_health_ok
+
         try:
-            # Teste simples sem fazer transcrição real
-            headers = {"Authorization": f"Bearer {self.api_key}"}
+            # Consulta apenas o modelo configurado: resposta de poucos bytes,
+            # em vez da lista completa de modelos
             response = await self.client.get(
-                "https://api.openai.com/v1/models", 
-                headers=headers,
+                f"https://api.openai.com/v1/models/{self.model}",
+                headers=self._auth_headers,
                 timeout=10.0
             )
-            return response.status_code == 200
+            healthy = response.status_code == 200
         except Exception as e:
             logger.warning(f"⚠️ Health check falhou: {e}")
-            return False
+            healthy = False
+
+        self._last_health_ok = healthy
+        self._last_health_ts = now
+        return healthy
 
     def get_service_info(self) -> dict:
         """Retorna informações do serviço"""
@@ -417,7 +656,13 @@ class WhisperService:
         }
 
     async def cleanup(self):
-        """Fecha cliente HTTP"""
-        if self.client and not self.client.is_closed:
-            await self.client.aclose()
+        """Libera cliente HTTP compartilhado (fechado quando a última instância sai)"""
+        global _SHARED_CLIENT_REFS
+        if self.client is None:
+            return
+
+        self.client = None
+        _SHARED_CLIENT_REFS -= 1
+        if _SHARED_CLIENT_REFS <= 0 and _SHARED_CLIENT and not _SHARED_CLIENT.is_closed:
+            await _SHARED_CLIENT.aclose()
             logger.info("✅ Cliente HTTP do WhisperService fechado")
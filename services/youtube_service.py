@@ -2,15 +2,172 @@ import os
 import asyncio
 import logging
 import tempfile
-import uuid
-from typing import Tuple, Optional, Dict
+import secrets
+import threading
+import concurrent.futures
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+import socket
+from typing import Tuple, Optional, Dict, List, Union
 import yt_dlp
+import shutil
 from pathlib import Path
 import time
 import random
 
+from utils import extract_youtube_id
+
 logger = logging.getLogger(__name__)
 
+# Cache de DNS para os hosts do YouTube: yt-dlp resolve os mesmos nomes
+# dezenas de vezes por vídeo (página, API, fragmentos do googlevideo).
+# Vale só nas threads do yt-dlp; as demais usam o getaddrinfo original
+DNS_CACHE_TTL = 300.0  # segundos
+DNS_CACHE_MAX_ENTRIES = 256  # LRU: hosts de fragmentos variam entre vídeos
+DNS_CACHE_DOMAINS = ('youtube.com', 'googlevideo.com', 'ytimg.com', 'youtu.be')
+_DNS_CACHE_SUFFIXES = tuple(f".{domain}" for domain in DNS_CACHE_DOMAINS)
+
+_original_getaddrinfo = socket.getaddrinfo
+_dns_cache: "OrderedDict[tuple, Tuple[float, list]]" = OrderedDict()
+_dns_cache_lock = threading.Lock()
+_dns_cache_scope = threading.local()
+_dns_cache_installed = False
+
+# Extractors do yt-dlp necessários (vídeos, shorts, youtu.be e URLs com lista)
+YTDLP_EXTRACTORS = ('Youtube', 'YoutubeTab')
+
+# Estratégias de download do yt-dlp em ordem de prioridade (desempate da
+# ordenação por histórico; executadas em pares concorrentes)
+DOWNLOAD_STRATEGIES = ("default", "mobile", "aggressive", "stealth")
+
+# Erros do yt-dlp que indicam bloqueio/autenticação (pedem refresh da sessão)
+AUTH_ERROR_PATTERN = re.compile(r'sign in|login|cookies|blocked|bot|unavailable', re.IGNORECASE)
+
+
+# Pausa de novos downloads após HTTP 429 do YouTube (sem Retry-After / teto)
+THROTTLE_COOLDOWN = 30.0  # segundos
+MAX_THROTTLE_WAIT = 300.0  # segundos
+_HTTP_429_PATTERN = re.compile(r'HTTP Error 429')
+
+# Formato de áudio baixado: a saída é OGG mono 16kHz (~45kbps) acelerado,
+# então bitrate acima disso só custa banda. Pega o menor áudio com pelo menos
+# 24kbps, preferindo Opus (ex.: itag 249, ~50kbps, em vez do 251, ~160kbps);
+# sem bitrate conhecido, cai para o melhor áudio
+AUDIO_FORMAT = (
+    'worstaudio[acodec=opus][abr>=24]'
+    '/worstaudio[abr>=24]'
+    '/bestaudio/best'
+)
+
+# Limpeza periódica de subdiretórios de download órfãos (sem atividade)
+JANITOR_INTERVAL = 30.0  # segundos
+ORPHAN_MAX_AGE = 600.0  # segundos
+
+# Limite de tamanho do áudio entregue (a API da OpenAI aceita até 25MB)
+MAX_AUDIO_SIZE_MB = 24
+# Bitrate estimado (conservador) do OGG Vorbis q1 mono 16kHz da compressão padrão
+COMPRESSED_BITRATE_KBPS = 48
+
+
+class YTDLStrategyError(RuntimeError):
+    """Todas as estratégias de download (e a tentativa final) falharam"""
+
+
+class YTDLCriticalError(RuntimeError):
+    """Erro inesperado fora das tentativas de download (compressão, sessão, etc.)"""
+
+
+@dataclass
+class DownloadAttempt:
+    """Resultado de uma tentativa de download com uma estratégia"""
+    ok: bool
+    strategy: str
+    path: Optional[str] = None
+    title: Optional[str] = None
+    unique_id: Optional[str] = None
+    size_bytes: int = 0
+    duration: float = 0.0  # Segundos, segundo o yt-dlp (0 se desconhecida)
+    kind: Optional[str] = None  # Falha: 'auth', 'network' ou 'fatal'
+    error: Optional[str] = None
+
+
+def _http_429_retry_after(error: BaseException) -> Optional[float]:
+    """
+    Procura um HTTP 429 na cadeia de exceções do yt-dlp
+
+    Returns:
+        Optional[float]: Segundos de espera (Retry-After ou THROTTLE_COOLDOWN),
+        ou None se o erro não for um 429
+    """
+    seen = set()
+    exc = error
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        response = getattr(exc, 'response', None)
+        status = getattr(exc, 'status', None) or getattr(response, 'status', None)
+        if status == 429:
+            headers = getattr(response, 'headers', None) or {}
+            try:
+                return min(MAX_THROTTLE_WAIT, float(headers.get('Retry-After')))
+            except (TypeError, ValueError):
+                return THROTTLE_COOLDOWN
+        exc_info = getattr(exc, 'exc_info', None)
+        exc = getattr(exc, 'cause', None) or (exc_info[1] if exc_info else None) or exc.__cause__
+
+    return THROTTLE_COOLDOWN if _HTTP_429_PATTERN.search(str(error)) else None
+
+
+def _enable_dns_cache_for_thread():
+    """Ativa o cache de DNS na thread atual (initializer do executor do yt-dlp)"""
+    _dns_cache_scope.enabled = True
+
+
+def _cached_getaddrinfo(host, port, family=0, type=0, proto=0, flags=0):
+    """getaddrinfo com cache TTL/LRU restrito aos domínios do YouTube nas threads do yt-dlp"""
+    if (
+        not getattr(_dns_cache_scope, 'enabled', False)
+        or not isinstance(host, str)
+        or not (host in DNS_CACHE_DOMAINS or host.endswith(_DNS_CACHE_SUFFIXES))
+    ):
+        return _original_getaddrinfo(host, port, family, type, proto, flags)
+
+    key = (host, port, family, type, proto, flags)
+    now = time.monotonic()
+    with _dns_cache_lock:
+        cached = _dns_cache.get(key)
+        if cached is not None:
+            if now - cached[0] < DNS_CACHE_TTL:
+                _dns_cache.move_to_end(key)
+                return cached[1]
+            del _dns_cache[key]
+
+    # Resolução fora do lock: nomes diferentes não esperam uns pelos outros
+    result = _original_getaddrinfo(host, port, family, type, proto, flags)
+    with _dns_cache_lock:
+        _dns_cache[key] = (now, result)
+        if len(_dns_cache) > DNS_CACHE_MAX_ENTRIES:
+            _dns_cache.popitem(last=False)
+    return result
+
+
+def _install_dns_cache():
+    """Instala o cache de DNS uma única vez e pré-aquece o host principal"""
+    global _dns_cache_installed
+    if _dns_cache_installed:
+        return
+    socket.getaddrinfo = _cached_getaddrinfo
+    _dns_cache_installed = True
+
+    def warm():
+        _enable_dns_cache_for_thread()
+        try:
+            socket.getaddrinfo('www.youtube.com', 443, type=socket.SOCK_STREAM)
+        except Exception as e:
+            logger.debug(f"Pré-aquecimento de DNS falhou: {e}")
+
+    threading.Thread(target=warm, daemon=True).start()
+
 class YouTubeService:
     """Serviço para baixar áudios de vídeos do YouTube com sessão persistente"""
 
@@ -26,11 +183,79 @@ class YouTubeService:
         self.cookies_path = cookies_path
         self.session_manager = session_manager
         self.last_download_time = 0
-        self.min_delay_between_downloads = 2
         self.download_count = 0
+
+        # Token bucket: rajadas de até rate_limit_capacity downloads, média
+        # sustentada de rate_limit_refill_rate downloads por segundo
+        self.rate_limit_capacity = 5
+        self.rate_limit_refill_rate = 0.5
+        self._tokens = float(self.rate_limit_capacity)
+        self._last_refill = time.monotonic()
+        self._rate_limit_lock = asyncio.Lock()
+
+        # AIMD sobre a taxa do token bucket: metade a cada bloqueio do
+        # YouTube, +rate_limit_increase por download bem-sucedido até o teto
+        self.rate_limit_max_rate = self.rate_limit_refill_rate
+        self.rate_limit_min_rate = 0.05
+        self.rate_limit_increase = 0.05
+
+        # Instante (monotonic) até o qual novos downloads aguardam após um 429
+        self._throttled_until = 0.0
+
+        # Downloads seguidos com sucesso a partir dos quais a verificação de
+        # sessão é pulada (zerado em falha de autenticação)
+        self.session_check_skip_after = 5
+        self._consecutive_successes = 0
+
+        # Light refresh da sessão no máximo uma vez por janela
+        self.light_refresh_ttl = 60.0  # segundos
+        self._last_light_refresh = float('-inf')
+
+        # Taxa de sucesso recente por estratégia (média móvel exponencial) e
+        # última estratégia vencedora: definem a ordem das rodadas
+        self._strategy_scores: Dict[str, float] = {strategy: 0.5 for strategy in DOWNLOAD_STRATEGIES}
+        self._last_winning_strategy: Optional[str] = None
+
+        # Downloads em andamento por ID do vídeo (coalescência de pedidos)
+        self._inflight_downloads: Dict[str, dict] = {}
+
+        # Refresh de sessão disparado no primeiro erro de autenticação,
+        # compartilhado entre downloads simultâneos
+        self._refresh_task: Optional[asyncio.Task] = None
+
+        # Tarefa de limpeza de órfãos, iniciada no primeiro download
+        self._janitor_task: Optional[asyncio.Task] = None
+
+        # Instâncias YoutubeDL reaproveitadas por thread e estratégia: mantêm
+        # conexões keep-alive com youtube.com/googlevideo.com entre downloads
+        self._ydl_local = threading.local()
+        self._ydl_instances: list = []
+        self._ydl_instances_lock = threading.Lock()
+
+        # Opções do yt-dlp por estratégia, montadas uma única vez
+        self._strategy_templates = {
+            strategy: self._build_strategy_options(strategy)
+            for strategy in DOWNLOAD_STRATEGIES
+        }
+
+        # Pool dedicado ao yt-dlp (não disputa o executor padrão do loop);
+        # threads fixas também mantêm as instâncias YoutubeDL por thread
+        self.max_concurrent_downloads = max(1, int(os.getenv("YTDLP_WORKERS", "4")))
+        # Limite de downloads simultâneos (evita disparar a detecção de bots),
+        # do mesmo tamanho do executor que executa os downloads
+        self._download_semaphore = asyncio.BoundedSemaphore(self.max_concurrent_downloads)
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.max_concurrent_downloads,
+            thread_name_prefix="ytdl",
+            initializer=_enable_dns_cache_for_thread
+        )
         
-        # Verificar se o arquivo de cookies existe
-        if os.path.exists(self.cookies_path):
+        _install_dns_cache()
+
+        # Verificar se o arquivo de cookies existe. O navegador só regrava o
+        # cookies.txt (nunca o apaga), então o resultado positivo é guardado
+        self._has_cookies = os.path.exists(self.cookies_path)
+        if self._has_cookies:
             logger.info(f"🍪 Arquivo de cookies encontrado: {self.cookies_path}")
         else:
             logger.warning("⚠️ Arquivo de cookies não encontrado")
@@ -43,17 +268,70 @@ class YouTubeService:
         logger.info(f"📁 Diretório temporário: {self.temp_dir}")
 
     async def _respect_rate_limit(self):
-        """Rate limiting entre downloads"""
-        current_time = time.time()
-        time_since_last = current_time - self.last_download_time
-        
-        if time_since_last < self.min_delay_between_downloads:
-            sleep_time = self.min_delay_between_downloads - time_since_last
-            logger.info(f"⏳ Rate limiting: aguardando {sleep_time:.1f}s...")
-            await asyncio.sleep(sleep_time)
-        
+        """Rate limiting entre downloads (token bucket)"""
+        # Pausa após 429 fora do lock: todos aguardam juntos, e uma pausa
+        # estendida durante a espera é respeitada na próxima volta
+        while (throttle_wait := self._throttled_until - time.monotonic()) > 0:
+            logger.info(f"🚦 YouTube pediu pausa (429): aguardando {throttle_wait:.1f}s...")
+            await asyncio.sleep(throttle_wait)
+
+        # Lock serializa a espera: quem chega depois aguarda o próximo token
+        async with self._rate_limit_lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.rate_limit_capacity,
+                self._tokens + (now - self._last_refill) * self.rate_limit_refill_rate
+            )
+            self._last_refill = now
+
+            if self._tokens < 1:
+                sleep_time = (1 - self._tokens) / self.rate_limit_refill_rate
+                logger.info(f"⏳ Rate limiting: aguardando {sleep_time:.1f}s...")
+                await asyncio.sleep(sleep_time)
+                self._tokens = 0.0
+                self._last_refill = time.monotonic()
+            else:
+                self._tokens -= 1
+
+        # Apenas informativo (get_download_stats); o limite usa time.monotonic()
         self.last_download_time = time.time()
 
+    def _strategy_rounds(self) -> Tuple[Tuple[str, ...], ...]:
+        """
+        Monta as rodadas de estratégias a partir do histórico
+
+        A última vencedora vai primeiro; as demais seguem pela taxa de sucesso
+        recente (empate mantém a ordem de DOWNLOAD_STRATEGIES).
+        """
+        ordered = sorted(
+            DOWNLOAD_STRATEGIES,
+            key=lambda strategy: (strategy != self._last_winning_strategy, -self._strategy_scores[strategy])
+        )
+        return tuple(tuple(ordered[i:i + 2]) for i in range(0, len(ordered), 2))
+
+    def _record_strategy_result(self, strategy: str, ok: bool):
+        """Atualiza a média móvel de sucesso da estratégia"""
+        score = self._strategy_scores.get(strategy, 0.5)
+        self._strategy_scores[strategy] = 0.9 * score + 0.1 * (1.0 if ok else 0.0)
+        if not ok and strategy == self._last_winning_strategy:
+            self._last_winning_strategy = None
+
+    def _adjust_rate_limit(self, blocked: bool):
+        """
+        Ajusta a taxa do token bucket (AIMD)
+
+        Args:
+            blocked: True se o YouTube recusou o download (bot/login/bloqueio)
+        """
+        if blocked:
+            self.rate_limit_refill_rate = max(self.rate_limit_min_rate, self.rate_limit_refill_rate * 0.5)
+            logger.warning(f"🐢 Bloqueio detectado, taxa de downloads reduzida para {self.rate_limit_refill_rate:.2f}/s")
+        else:
+            self.rate_limit_refill_rate = min(
+                self.rate_limit_max_rate,
+                self.rate_limit_refill_rate + self.rate_limit_increase
+            )
+
     async def _ensure_session_fresh(self):
         """Garante que a sessão persistente está fresca"""
         if not self.session_manager:
@@ -67,8 +345,11 @@ class YouTubeService:
                 logger.warning("⚠️ Sessão não está saudável, tentando refresh...")
                 return await self.session_manager.force_refresh()
             
-            # Fazer light refresh para manter ativa
-            await self.session_manager.light_refresh()
+            # Light refresh para manter ativa, no máximo uma vez por TTL
+            now = time.monotonic()
+            if now - self._last_light_refresh > self.light_refresh_ttl:
+                await self.session_manager.light_refresh()
+                self._last_light_refresh = time.monotonic()
             return True
             
         except Exception as e:
@@ -85,22 +366,35 @@ class YouTubeService:
             enable_compression: Ativa compressão agressiva para reduzir tamanho
             speed_up: Acelera áudio em 2x para reduzir duração
         """
-        output_template = os.path.join(self.temp_dir, f'{unique_id}.%(ext)s')
-        
-        # Sempre fazer download em MP3 padrão primeiro
-        # A compressão será aplicada após o download se necessário
-        postprocessors = [{
-            'key': 'FFmpegExtractAudio',
-            'preferredcodec': 'mp3',
-            'preferredquality': '128',
-        }]
-        postprocessor_args = ['-ar', '22050', '-ac', '1']  # Mono, 22kHz
+        # Template da estratégia montado no __init__; só o destino e os
+        # cookies variam por download (cookies.txt pode surgir depois)
+        opts = {
+            **self._strategy_templates.get(strategy, self._strategy_templates["default"]),
+            'outtmpl': os.path.join(self._work_dir(unique_id), f'{unique_id}.%(ext)s'),
+        }
+        if self._cookies_available():
+            opts['cookiefile'] = self.cookies_path
 
+        return opts
+
+    def _cookies_available(self) -> bool:
+        """Verifica o cookies.txt até ele aparecer; depois não faz mais stat"""
+        if not self._has_cookies:
+            self._has_cookies = os.path.exists(self.cookies_path)
+        return self._has_cookies
+
+    @staticmethod
+    def _build_strategy_options(strategy: str) -> dict:
+        """
+        Monta as opções fixas do yt-dlp para uma estratégia
+
+        Args:
+            strategy: Estratégia (default, mobile, aggressive, stealth)
+        """
+        # Baixar o áudio no codec original, sem pós-processador do yt-dlp:
+        # a compressão pós-download faz a única passada de ffmpeg (OGG mono)
         base_opts = {
-            'format': 'bestaudio/best',
-            'outtmpl': output_template,
-            'postprocessors': postprocessors,
-            'postprocessor_args': postprocessor_args,
+            'format': AUDIO_FORMAT,
             'noplaylist': True,
             'quiet': True,
             'no_warnings': True,
@@ -109,6 +403,12 @@ class YouTubeService:
             'retry_sleep': 2,
             'fragment_retries': 5,
             'skip_unavailable_fragments': True,
+            # Fragmentos DASH/HLS em paralelo e downloads HTTP em blocos de
+            # 10MB (evita o throttling do googlevideo em respostas longas)
+            'concurrent_fragment_downloads': int(os.getenv("YTDLP_CONCURRENT_FRAGMENTS", "5")),
+            'http_chunk_size': 10 * 1024 * 1024,
+            # Buffer de leitura inicial de 64KB (yt-dlp ainda ajusta sozinho)
+            'buffersize': 64 * 1024,
         }
 
         if strategy == "mobile":
@@ -175,7 +475,9 @@ class YouTubeService:
                     'Sec-Fetch-Site': 'same-origin'
                 },
                 'sleep_interval': 1,
-                'max_sleep_interval': 3
+                'max_sleep_interval': 3,
+                # Um fragmento por vez para manter o perfil discreto
+                'concurrent_fragment_downloads': 1
             })
         else:
             # Estratégia padrão otimizada
@@ -197,16 +499,15 @@ class YouTubeService:
                 }
             })
 
-        # Adicionar cookies se disponível
-        if os.path.exists(self.cookies_path):
-            base_opts['cookiefile'] = self.cookies_path
-
         return base_opts
 
     async def download_audio(self, video_url: str) -> Tuple[str, str]:
         """
         Baixa áudio com sessão persistente ativa
 
+        Pedidos simultâneos do mesmo vídeo compartilham um único download;
+        cada chamador recebe seu próprio arquivo (hardlink do original).
+
         Args:
             video_url: URL do vídeo do YouTube
 
@@ -214,7 +515,122 @@ class YouTubeService:
             Tuple[str, str]: (caminho_do_audio, titulo_do_video)
 
         Raises:
-            Exception: Se houver erro no download
+            YTDLStrategyError: Se todas as estratégias de download falharem
+            YTDLCriticalError: Se houver erro inesperado no processamento
+        """
+        self._ensure_janitor()
+        video_key = extract_youtube_id(video_url) or video_url
+
+        entry = self._inflight_downloads.get(video_key)
+        if entry is None:
+            # Download em tarefa própria: o cancelamento de um chamador não
+            # interrompe os demais que aguardam o mesmo vídeo
+            entry = {'waiters': 0}
+            entry['task'] = asyncio.create_task(self._shared_download(video_key, video_url, entry))
+            self._inflight_downloads[video_key] = entry
+        else:
+            logger.info(f"🔗 Download de {video_key} já em andamento, aguardando resultado...")
+
+        task = entry['task']
+        entry['waiters'] += 1
+        try:
+            files, video_title = await asyncio.shield(task)
+        except asyncio.CancelledError:
+            entry['waiters'] -= 1
+            if task.done():
+                # Arquivo já reservado para este chamador: ninguém mais o retira
+                if not task.cancelled() and task.exception() is None:
+                    files, _ = task.result()
+                    if files:
+                        self._unlink_quietly(files.pop())
+            elif entry['waiters'] == 0:
+                # Nenhum chamador aguardando: abortar o download
+                if self._inflight_downloads.get(video_key) is entry:
+                    del self._inflight_downloads[video_key]
+                task.cancel()
+            raise
+
+        return files.pop(), video_title
+
+    async def _shared_download(self, video_key: str, video_url: str, entry: dict) -> Tuple[List[str], str]:
+        """
+        Executa o download compartilhado e prepara um arquivo por chamador
+
+        Args:
+            video_key: Chave do download em _inflight_downloads
+            video_url: URL do vídeo do YouTube
+            entry: Registro do download (contagem de chamadores em espera)
+
+        Returns:
+            Tuple[List[str], str]: (um arquivo por chamador, titulo_do_video)
+        """
+        try:
+            audio_path, video_title = await self._download_audio(video_url)
+        finally:
+            # Pedidos a partir daqui iniciam um novo download
+            if self._inflight_downloads.get(video_key) is entry:
+                del self._inflight_downloads[video_key]
+
+        # O primeiro chamador fica com o original e os demais com cópias; o
+        # consumidor remove o arquivo após o uso (WhisperService.transcribe)
+        files = [audio_path]
+        try:
+            while len(files) < entry['waiters']:
+                files.append(await asyncio.to_thread(self._clone_audio, audio_path))
+        except BaseException:
+            for path in files:
+                self._unlink_quietly(path)
+            raise
+
+        # Chamadores que desistiram durante as cópias não retiram seus arquivos
+        while len(files) > entry['waiters']:
+            self._unlink_quietly(files.pop())
+        return files, video_title
+
+    async def download_audios(self, video_urls: List[str], max_concurrency: int = 3) -> List[Union[Tuple[str, str], BaseException]]:
+        """
+        Baixa vários áudios em paralelo, com limite de downloads simultâneos
+
+        O token bucket de _respect_rate_limit continua espaçando os inícios;
+        a falha de um vídeo não interrompe os demais.
+
+        Args:
+            video_urls: URLs dos vídeos do YouTube
+            max_concurrency: Máximo de downloads simultâneos deste lote
+
+        Returns:
+            List: (caminho_do_audio, titulo_do_video) ou a exceção, na ordem das URLs
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def bounded_download(video_url: str) -> Tuple[str, str]:
+            async with semaphore:
+                return await self.download_audio(video_url)
+
+        return await asyncio.gather(
+            *(bounded_download(url) for url in video_urls),
+            return_exceptions=True
+        )
+
+    def _clone_audio(self, audio_path: str) -> str:
+        """Cria cópia independente do áudio (hardlink; cópia se indisponível)"""
+        base, ext = os.path.splitext(audio_path)
+        clone_path = f"{base}_{secrets.token_hex(4)}{ext}"
+        try:
+            os.link(audio_path, clone_path)
+        except OSError:
+            shutil.copyfile(audio_path, clone_path)
+        return clone_path
+
+    async def _download_audio(self, video_url: str) -> Tuple[str, str]:
+        """
+        Executa o download (estratégias, compressão e fallback de sessão)
+
+        Args:
+            video_url: URL do vídeo do YouTube
+
+        Returns:
+            Tuple[str, str]: (caminho_do_audio, titulo_do_video)
         """
         try:
             self.download_count += 1
@@ -223,8 +639,9 @@ class YouTubeService:
             # Rate limiting
             await self._respect_rate_limit()
 
-            # Garantir sessão fresca se disponível
-            if self.session_manager:
+            # Garantir sessão fresca se disponível; após uma sequência de
+            # downloads bem-sucedidos a verificação é dispensada
+            if self.session_manager and self._consecutive_successes < self.session_check_skip_after:
                 session_fresh = await self._ensure_session_fresh()
                 if session_fresh:
                     logger.info("✅ Sessão persistente verificada/atualizada")
@@ -235,195 +652,436 @@ class YouTubeService:
             enable_compression, speed_up = True, True
             logger.info("🚀 Configuração: compressão OGG + velocidade 2x (sempre aplicada)")
 
-            # Estratégias de download em ordem de prioridade
-            strategies = ["default", "mobile", "aggressive", "stealth"]
-            
-            for strategy_index, strategy in enumerate(strategies):
+            # Estratégias ordenadas pelo histórico, executadas em pares concorrentes:
+            # a primeira que concluir vence e a outra é descartada
+            strategy_rounds = self._strategy_rounds()
+
+            result: Optional[DownloadAttempt] = None
+            last_failure: Optional[DownloadAttempt] = None
+            refresh_task: Optional[asyncio.Task] = None
+            throttled = False
+
+            for round_index, round_strategies in enumerate(strategy_rounds):
+                logger.info(f"🎯 Rodada {round_index + 1}/{len(strategy_rounds)} - Estratégias em paralelo: {', '.join(round_strategies)}")
+
+                tasks = {
+                    asyncio.create_task(
+                        self._attempt_download(video_url, strategy, enable_compression, speed_up)
+                    ): strategy
+                    for strategy in round_strategies
+                }
+                pending = set(tasks)
+
                 try:
-                    logger.info(f"🎯 Tentativa {strategy_index + 1}/{len(strategies)} - Estratégia: {strategy}")
-                    
-                    unique_id = str(uuid.uuid4())[:8]
-                    # Sempre baixar como MP3 primeiro
-                    final_audio_path = os.path.join(self.temp_dir, f"{unique_id}.mp3")
-                    ydl_opts = self._get_yt_dlp_options(unique_id, strategy, enable_compression, speed_up)
-
-                    logger.info(f"🔽 Baixando áudio com estratégia '{strategy}'...")
-
-                    # Executar download de forma assíncrona
-                    loop = asyncio.get_event_loop()
-                    info_dict = await loop.run_in_executor(
-                        None, 
-                        self._download_with_ytdlp, 
-                        video_url, 
-                        ydl_opts
-                    )
-
-                    video_title = info_dict.get('title', 'Título não encontrado')
-
-                    # Verificar se arquivo foi criado
-                    if not os.path.exists(final_audio_path):
-                        # Procurar arquivo com extensão diferente
-                        for file in os.listdir(self.temp_dir):
-                            if file.startswith(unique_id):
-                                final_audio_path = os.path.join(self.temp_dir, file)
-                                break
-                        
-                        if not os.path.exists(final_audio_path):
-                            raise Exception(f"Arquivo de áudio não foi criado: {final_audio_path}")
-
-                    file_size = os.path.getsize(final_audio_path) / (1024 * 1024)
-
-                    logger.info(f"✅ Download #{self.download_count} bem-sucedido!")
-                    logger.info(f"📄 Título: {video_title}")
-                    logger.info(f"📊 Tamanho: {file_size:.2f}MB")
-                    logger.info(f"🎯 Estratégia: {strategy}")
-                    logger.info(f"🗜️ Compressão: {'Ativa' if enable_compression else 'Padrão'}")
-                    logger.info(f"⚡ Velocidade: {'2x' if speed_up else '1x'}")
-
-                    # Aplicar compressão pós-download se necessário
-                    if enable_compression or speed_up:
-                        logger.info("🔄 Aplicando compressão pós-download...")
-                        final_audio_path = await self._post_download_compression(
-                            final_audio_path, unique_id, enable_compression, speed_up
-                        )
-                        file_size = os.path.getsize(final_audio_path) / (1024 * 1024)
-                        logger.info(f"📊 Tamanho após compressão: {file_size:.2f}MB")
-
-                    # Verificar se ainda está muito grande e aplicar compressão de emergência
-                    if file_size > 24:  # Muito próximo do limite
-                        logger.warning(f"⚠️ Arquivo ainda muito grande ({file_size:.2f}MB), aplicando compressão de emergência...")
-                        final_audio_path = await self._emergency_compression(final_audio_path, unique_id)
-                        file_size = os.path.getsize(final_audio_path) / (1024 * 1024)
-                        logger.info(f"🗜️ Após compressão de emergência: {file_size:.2f}MB")
-
-                    return final_audio_path, video_title
-
-                except yt_dlp.utils.DownloadError as e:
-                    error_msg = str(e).lower()
-                    logger.warning(f"❌ Estratégia '{strategy}' falhou: {e}")
-                    
-                    # Se não é a última estratégia, continuar tentando
-                    if strategy_index < len(strategies) - 1:
-                        # Delay progressivo entre tentativas
-                        delay = random.uniform(2, 5) * (strategy_index + 1)
-                        logger.info(f"⏳ Aguardando {delay:.1f}s antes da próxima tentativa...")
-                        await asyncio.sleep(delay)
-                        continue
-                    else:
-                        # Última tentativa - verificar se é problema de autenticação
-                        if any(keyword in error_msg for keyword in 
-                               ['sign in', 'login', 'cookies', 'blocked', 'bot', 'unavailable']):
-                            
-                            if self.session_manager:
-                                logger.info("🔄 Problema de autenticação detectado, forçando refresh da sessão...")
-                                try:
-                                    refresh_success = await self.session_manager.force_refresh()
-                                    if refresh_success:
-                                        logger.info("✅ Sessão renovada! Tentando download final...")
-                                        return await self._final_retry_download(video_url)
-                                    else:
-                                        logger.error("❌ Falha ao renovar sessão")
-                                except Exception as refresh_error:
-                                    logger.error(f"❌ Erro ao renovar sessão: {refresh_error}")
-                        
-                        # Se chegou aqui, todas as estratégias falharam
-                        raise Exception(f"Todas as estratégias falharam. Último erro: {e}")
-
-                except Exception as e:
-                    logger.warning(f"❌ Erro inesperado na estratégia '{strategy}': {e}")
-                    if strategy_index < len(strategies) - 1:
-                        continue
-                    else:
-                        raise Exception(f"Download falhou com erro: {e}")
-
-            # Não deveria chegar aqui
-            raise Exception("Erro inesperado no loop de estratégias")
+                    while pending and result is None:
+                        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                        for task in done:
+                            attempt = task.result()
+                            self._record_strategy_result(attempt.strategy, attempt.ok)
+                            if not attempt.ok:
+                                last_failure = attempt
+                                if attempt.kind == 'auth':
+                                    self._consecutive_successes = 0
+                                    if not throttled:
+                                        throttled = True
+                                        self._adjust_rate_limit(blocked=True)
+                                    # Renovar a sessão já, em paralelo às estratégias
+                                    # restantes, em vez de só depois que todas falharem
+                                    if self.session_manager and refresh_task is None:
+                                        logger.info("🔄 Erro de autenticação, renovando sessão em paralelo...")
+                                        refresh_task = self._start_session_refresh()
+                                logger.warning(f"❌ Estratégia '{attempt.strategy}' falhou ({attempt.kind}): {attempt.error}")
+                            elif result is None:
+                                result = attempt
+                                self._last_winning_strategy = attempt.strategy
+                finally:
+                    # Cancelar tentativas ainda em andamento (também se task.result()
+                    # levantar uma exceção não classificada)
+                    for task in pending:
+                        task.cancel()
+                    if pending:
+                        await asyncio.gather(*pending, return_exceptions=True)
+
+                    # Descartar arquivos das concluídas que não venceram (duas
+                    # juntas, ou não processadas após uma exceção)
+                    for task in tasks:
+                        if task.done() and not task.cancelled() and task.exception() is None:
+                            attempt = task.result()
+                            if attempt.ok and attempt is not result:
+                                self._discard_download(attempt.unique_id)
+
+                if result is not None:
+                    break
+
+                # Backoff exponencial com jitter antes da próxima rodada
+                if round_index < len(strategy_rounds) - 1:
+                    delay = min(60, 2 * 2 ** round_index) + random.uniform(0, 2)
+                    logger.info(f"⏳ Aguardando {delay:.1f}s antes da próxima tentativa...")
+                    await asyncio.sleep(delay)
+
+            if result is None:
+                self._consecutive_successes = 0
+
+                # Todas falharam - verificar se é problema de autenticação
+                if last_failure is not None and last_failure.kind == 'auth':
+                    if self.session_manager:
+                        logger.info("🔄 Problema de autenticação detectado, aguardando refresh da sessão...")
+                        try:
+                            refresh_success = await asyncio.shield(refresh_task or self._start_session_refresh())
+                            if refresh_success:
+                                logger.info("✅ Sessão renovada! Tentando download final...")
+                                return await self._final_retry_download(video_url)
+                            else:
+                                logger.error("❌ Falha ao renovar sessão")
+                        except Exception as refresh_error:
+                            logger.error(f"❌ Erro ao renovar sessão: {refresh_error}")
+
+                last_error = last_failure.error if last_failure else None
+                raise YTDLStrategyError(f"Todas as estratégias falharam. Último erro: {last_error}")
+
+            self._consecutive_successes += 1
+            self._adjust_rate_limit(blocked=False)
+            final_audio_path, video_title = result.path, result.title
+            unique_id, strategy = result.unique_id, result.strategy
+            file_size = result.size_bytes / (1024 * 1024)
+
+            # Resumo em um único registro (uma só passada pelos handlers)
+            logger.info(
+                f"✅ Download #{self.download_count} bem-sucedido!\n"
+                f"📄 Título: {video_title}\n"
+                f"📊 Tamanho: {file_size:.2f}MB\n"
+                f"🎯 Estratégia: {strategy}\n"
+                f"🗜️ Compressão: {'Ativa' if enable_compression else 'Padrão'}\n"
+                f"⚡ Velocidade: {'2x' if speed_up else '1x'}"
+            )
+
+            # Se pela duração nem a compressão padrão (2x) cabe no limite, ir
+            # direto para a de emergência: uma passada de ffmpeg em vez de duas
+            predicted_size = result.duration / 2 * COMPRESSED_BITRATE_KBPS / 8 / 1024
+            if predicted_size > MAX_AUDIO_SIZE_MB:
+                logger.warning(f"⚠️ Tamanho previsto após compressão: {predicted_size:.2f}MB, aplicando compressão de emergência direto...")
+                # Direto do original: mesma aceleração total das duas passadas (2x * 2.5x)
+                final_audio_path = await self._emergency_compression(
+                    final_audio_path, unique_id, tempo_filter='atempo=2.0,atempo=2.5'
+                )
+                file_size = await asyncio.to_thread(os.path.getsize, final_audio_path) / (1024 * 1024)
+                logger.info(f"🗜️ Após compressão de emergência: {file_size:.2f}MB")
+
+            # Aplicar compressão pós-download se necessário
+            elif enable_compression or speed_up:
+                logger.info("🔄 Aplicando compressão pós-download...")
+                final_audio_path = await self._post_download_compression(
+                    final_audio_path, unique_id, enable_compression, speed_up
+                )
+                file_size = await asyncio.to_thread(os.path.getsize, final_audio_path) / (1024 * 1024)
+                logger.info(f"📊 Tamanho após compressão: {file_size:.2f}MB")
+
+            # Verificar se ainda está muito grande e aplicar compressão de emergência
+            if file_size > MAX_AUDIO_SIZE_MB and not final_audio_path.endswith("_emergency.ogg"):
+                logger.warning(f"⚠️ Arquivo ainda muito grande ({file_size:.2f}MB), aplicando compressão de emergência...")
+                final_audio_path = await self._emergency_compression(final_audio_path, unique_id)
+                file_size = await asyncio.to_thread(os.path.getsize, final_audio_path) / (1024 * 1024)
+                logger.info(f"🗜️ Após compressão de emergência: {file_size:.2f}MB")
 
+            final_audio_path = await asyncio.to_thread(self._finalize_download, final_audio_path, unique_id)
+            return final_audio_path, video_title
+
+        except YTDLStrategyError:
+            raise
         except Exception as e:
-            if "Todas as estratégias" not in str(e) and "Download falhou" not in str(e):
-                logger.error(f"❌ Erro crítico no download #{self.download_count}: {e}")
-                raise Exception(f"Falha crítica no download: {e}")
-            else:
-                raise
+            logger.error(f"❌ Erro crítico no download #{self.download_count}: {e}")
+            raise YTDLCriticalError(f"Falha crítica no download: {e}") from e
+
+    def _start_session_refresh(self) -> asyncio.Task:
+        """Dispara (ou reaproveita) o force_refresh da sessão em background"""
+        task = self._refresh_task
+        if task is None or task.done():
+            task = self._refresh_task = asyncio.create_task(self.session_manager.force_refresh())
+            # Consumir a exceção caso nenhum download chegue a aguardar o refresh
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return task
+
+    async def _attempt_download(self, video_url: str, strategy: str, enable_compression: bool, speed_up: bool) -> DownloadAttempt:
+        """
+        Executa uma tentativa de download com a estratégia informada
+
+        Falhas são classificadas aqui e devolvidas no resultado, sem exceção;
+        apenas o cancelamento da tentativa é propagado.
+
+        Returns:
+            DownloadAttempt: Resultado da tentativa
+        """
+        unique_id = secrets.token_hex(4)
+        final_audio_path = os.path.join(self._work_dir(unique_id), f"{unique_id}.*")
+        ydl_opts = self._get_yt_dlp_options(unique_id, strategy, enable_compression, speed_up)
+
+        logger.info(f"🔽 Baixando áudio com estratégia '{strategy}'...")
+
+        # Executar download de forma assíncrona; o evento interrompe a thread
+        # do yt-dlp (progress hook) se a tentativa for cancelada ou perder
+        cancel_event = threading.Event()
+        download = await self._submit_download(video_url, ydl_opts, strategy, unique_id, cancel_event)
+        try:
+            info_dict, downloaded_path, size_bytes = await asyncio.shield(download)
+        except asyncio.CancelledError:
+            # A thread para no próximo bloco/fragmento e libera a vaga; os
+            # arquivos desta tentativa são descartados quando ela terminar
+            cancel_event.set()
+            download.add_done_callback(lambda f: self._discard_download(unique_id, f))
+            raise
+        except yt_dlp.utils.DownloadError as e:
+            # Remover fragmentos/.part deixados pela tentativa que falhou
+            await asyncio.to_thread(self._discard_download, unique_id)
+            retry_after = _http_429_retry_after(e)
+            if retry_after is not None:
+                # Segurar os próximos downloads em vez de queimar tentativas em 429
+                self._throttled_until = max(self._throttled_until, time.monotonic() + retry_after)
+                logger.warning(f"🚦 HTTP 429 do YouTube, pausando novos downloads por {retry_after:.0f}s")
+            kind = 'auth' if AUTH_ERROR_PATTERN.search(str(e)) else 'network'
+            return DownloadAttempt(ok=False, strategy=strategy, kind=kind, error=str(e))
+        except Exception as e:
+            await asyncio.to_thread(self._discard_download, unique_id)
+            return DownloadAttempt(ok=False, strategy=strategy, kind='fatal', error=str(e))
+
+        video_title = info_dict.get('title', 'Título não encontrado')
+
+        # Verificar se arquivo foi criado (localizado na thread do download)
+        if downloaded_path is None:
+            return DownloadAttempt(
+                ok=False, strategy=strategy, kind='fatal',
+                error=f"Arquivo de áudio não foi criado: {final_audio_path}"
+            )
+
+        return DownloadAttempt(
+            ok=True, strategy=strategy, path=downloaded_path,
+            title=video_title, unique_id=unique_id, size_bytes=size_bytes,
+            duration=float(info_dict.get('duration') or 0)
+        )
+
+    async def _submit_download(self, video_url: str, ydl_opts: dict, strategy: str, unique_id: str,
+                               cancel_event: Optional[threading.Event] = None) -> asyncio.Future:
+        """
+        Aguarda vaga no limite de downloads e envia o download do yt-dlp ao executor
+
+        Args:
+            cancel_event: Quando definido, interrompe o download na thread
+
+        Returns:
+            asyncio.Future: Future do download (resolve com (info_dict, caminho, tamanho))
+        """
+        await self._download_semaphore.acquire()
+        download = asyncio.get_running_loop().run_in_executor(
+            self._executor,
+            self._download_with_ytdlp,
+            video_url,
+            ydl_opts,
+            strategy,
+            unique_id,
+            cancel_event
+        )
+        # Liberar a vaga só quando a thread terminar, mesmo se a tentativa
+        # for cancelada antes disso
+        download.add_done_callback(lambda _: self._download_semaphore.release())
+        return download
+
+    def _resolve_downloaded_file(self, info_dict: dict, unique_id: str, ydl: Optional[yt_dlp.YoutubeDL] = None) -> Optional[str]:
+        """
+        Localiza o arquivo final produzido pelo yt-dlp
+
+        Usa o caminho registrado em requested_downloads ou, sem ele, o nome
+        calculado pelo próprio yt-dlp (prepare_filename); varre o diretório
+        temporário só se nenhum dos dois existir.
+
+        Returns:
+            Optional[str]: Caminho do arquivo ou None se não foi criado
+        """
+        requested = (info_dict or {}).get('requested_downloads') or [{}]
+        filepath = requested[0].get('filepath')
+        if filepath and os.path.exists(filepath):
+            return filepath
+
+        if ydl is not None and info_dict:
+            filepath = ydl.prepare_filename(info_dict)
+            if os.path.exists(filepath):
+                return filepath
+
+        try:
+            with os.scandir(self._work_dir(unique_id)) as entries:
+                return next((e.path for e in entries if e.name.startswith(unique_id)), None)
+        except FileNotFoundError:
+            return None
+
+    async def release(self, audio_path: str):
+        """
+        Remove um áudio entregue por download_audio após o consumo
+
+        Quem chama download_audio é dono do arquivo retornado e deve liberá-lo
+        assim que terminar de usá-lo (o WhisperService.transcribe já remove o
+        áudio ao final); assim o disco fica limitado aos downloads em uso.
+
+        Args:
+            audio_path: Caminho retornado por download_audio
+        """
+        await asyncio.to_thread(self._unlink_quietly, audio_path)
+
+    @staticmethod
+    def _unlink_quietly(path: str):
+        """Remove um arquivo ignorando se ele já não existe"""
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"⚠️ Erro ao remover arquivo {path}: {e}")
+
+    def _discard_download(self, unique_id: str, future: Optional[asyncio.Future] = None):
+        """Remove arquivos de uma tentativa de download descartada"""
+        if future is not None and not future.cancelled():
+            future.exception()  # Marcar exceção como consumida
+        work_dir = self._work_dir(unique_id)
+        try:
+            if os.path.isdir(work_dir):
+                shutil.rmtree(work_dir)
+                logger.info(f"🗑️ Download descartado removido: {unique_id}")
+        except Exception as e:
+            logger.debug(f"Erro ao remover download descartado: {e}")
+
+    def _ensure_janitor(self):
+        """Inicia a limpeza periódica de órfãos, se ainda não estiver rodando"""
+        if self._janitor_task is None or self._janitor_task.done():
+            self._janitor_task = asyncio.create_task(self._janitor())
+
+    async def _janitor(self):
+        """Remove periodicamente subdiretórios de download abandonados"""
+        while True:
+            await asyncio.sleep(JANITOR_INTERVAL)
+            try:
+                removed = await asyncio.to_thread(self._sweep_orphan_work_dirs)
+                if removed:
+                    logger.info(f"🧹 {removed} download(s) órfão(s) removido(s)")
+            except Exception as e:
+                logger.debug(f"Erro na limpeza de órfãos: {e}")
+
+    def _sweep_orphan_work_dirs(self) -> int:
+        """
+        Remove subdiretórios de download sem escrita há ORPHAN_MAX_AGE
+
+        Downloads e compressões em andamento escrevem continuamente no seu
+        subdiretório; áudios já entregues (arquivos soltos) pertencem a quem
+        chamou download_audio e não são tocados.
+
+        Returns:
+            int: Quantidade de subdiretórios removidos
+        """
+        cutoff = time.time() - ORPHAN_MAX_AGE
+        removed = 0
+        with os.scandir(self.temp_dir) as entries:
+            for entry in entries:
+                if not entry.is_dir(follow_symlinks=False):
+                    continue
+                try:
+                    last_write = entry.stat().st_mtime
+                    with os.scandir(entry.path) as files:
+                        for f in files:
+                            last_write = max(last_write, f.stat().st_mtime)
+                except FileNotFoundError:
+                    continue
+                if last_write < cutoff:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                    removed += 1
+        return removed
+
+    def _work_dir(self, unique_id: str) -> str:
+        """Subdiretório exclusivo de um download (arquivos parciais e intermediários)"""
+        return os.path.join(self.temp_dir, unique_id)
+
+    def _finalize_download(self, audio_path: str, unique_id: str) -> str:
+        """
+        Move o áudio final para o diretório temporário e remove o subdiretório
+        do download, limitando o número de entradas aos downloads em andamento
+
+        Returns:
+            str: Novo caminho do áudio
+        """
+        final_path = os.path.join(self.temp_dir, os.path.basename(audio_path))
+        os.replace(audio_path, final_path)
+        shutil.rmtree(self._work_dir(unique_id), ignore_errors=True)
+        return final_path
 
     async def _post_download_compression(self, audio_path: str, unique_id: str, enable_compression: bool, speed_up: bool) -> str:
         """
         Aplica compressão após o download usando formatos suportados pela OpenAI
         """
+        # Todo download passa pela compressão OGG; acelerar sem comprimir
+        # exigiria um segundo encode só para o atempo
+        if not enable_compression:
+            logger.warning("⚠️ Aceleração sem compressão não suportada, mantendo áudio original")
+            return audio_path
+
+        # Usar OGG Vorbis (suportado pela OpenAI); o ffmpeg escreve num .tmp
+        # que só vira o arquivo final após sucesso
+        compressed_path = os.path.join(self._work_dir(unique_id), f"{unique_id}_compressed.ogg")
+        tmp_path = f"{compressed_path}.tmp"
         try:
-            if enable_compression:
-                # Usar OGG Vorbis (suportado pela OpenAI)
-                compressed_path = os.path.join(self.temp_dir, f"{unique_id}_compressed.ogg")
-
-                # Comando ffmpeg para compressão com OGG Vorbis
-                cmd = [
-                    'ffmpeg', '-y',  # Forçar overwrite
-                    '-i', audio_path,
-                    '-vn',  # Sem vídeo
-                    '-map_metadata', '-1',  # Remover metadados
-                    '-ac', '1',  # Mono
-                    '-ar', '16000',  # Sample rate 16kHz
-                    '-c:a', 'libvorbis',  # Codec Vorbis
-                    '-q:a', '1',  # Qualidade baixa (~45kbps) - mais compatível que bitrate fixo
-                ]
-
-                if speed_up:
-                    cmd.extend(['-af', 'atempo=2.0'])  # Acelerar 2x
-
-                cmd.append(compressed_path)
 
-            else:
-                # Apenas acelerar sem compressão adicional
-                compressed_path = os.path.join(self.temp_dir, f"{unique_id}_speed.mp3")
-
-                cmd = [
-                    'ffmpeg', '-y',
-                    '-i', audio_path,
-                    '-vn',
-                    '-ac', '1',  # Mono
-                    '-ar', '22050',  # Manter sample rate
-                    '-b:a', '96k',  # Bitrate um pouco menor
-                    '-af', 'atempo=2.0',  # Acelerar 2x
-                    compressed_path
-                ]
-
-            logger.info(f"🔧 Executando compressão: {'OGG baixa qualidade+aceleração 2x' if enable_compression and speed_up else 'OGG baixa qualidade' if enable_compression else 'MP3+aceleração 2x'}")
+            # Comando ffmpeg para compressão com OGG Vorbis
+            cmd = [
+                'ffmpeg', '-hide_banner', '-v', 'error', '-y',  # Só erros no stderr; forçar overwrite
+                '-i', audio_path,
+                '-vn',  # Sem vídeo
+                '-map_metadata', '-1',  # Remover metadados
+                '-ac', '1',  # Mono
+                '-ar', '16000',  # Sample rate 16kHz
+                '-c:a', 'libvorbis',  # Codec Vorbis
+                '-q:a', '1',  # Qualidade baixa (~45kbps) - mais compatível que bitrate fixo
+            ]
+
+            if speed_up:
+                cmd.extend(['-af', 'atempo=2.0'])  # Acelerar 2x
+
+            cmd.extend(['-f', 'ogg', tmp_path])  # Muxer explícito (extensão .tmp)
+
+            logger.info(f"🔧 Executando compressão: {'OGG baixa qualidade+aceleração 2x' if speed_up else 'OGG baixa qualidade'}")
 
             result = await asyncio.create_subprocess_exec(
                 *cmd,
-                stdout=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.DEVNULL,  # Saída vai para arquivo
                 stderr=asyncio.subprocess.PIPE
             )
 
-            stdout, stderr = await result.communicate()
+            _, stderr = await result.communicate()
 
             if result.returncode != 0:
                 logger.error(f"❌ Erro na compressão pós-download: {stderr.decode()}")
                 return audio_path  # Retorna o original
 
-            # Remover arquivo original
-            if os.path.exists(audio_path):
-                os.remove(audio_path)
-
+            await asyncio.to_thread(self._commit_compressed, tmp_path, compressed_path, audio_path)
             return compressed_path
 
         except Exception as e:
             logger.error(f"❌ Falha na compressão pós-download: {e}")
             return audio_path  # Retorna o original em caso de erro
+        finally:
+            # Saída parcial de uma compressão que falhou (no sucesso já foi renomeada)
+            await asyncio.to_thread(self._unlink_quietly, tmp_path)
 
-    async def _emergency_compression(self, audio_path: str, unique_id: str) -> str:
+    async def _emergency_compression(self, audio_path: str, unique_id: str, tempo_filter: str = 'atempo=2.5') -> str:
         """
         Aplica compressão extrema para arquivos que ainda estão muito grandes
+
+        Args:
+            audio_path: Áudio de entrada
+            unique_id: ID único do download
+            tempo_filter: Filtro de aceleração (o padrão supõe entrada já em 2x)
         """
+        # Novo arquivo com compressão máxima usando OGG Vorbis (via .tmp)
+        compressed_path = os.path.join(self._work_dir(unique_id), f"{unique_id}_emergency.ogg")
+        tmp_path = f"{compressed_path}.tmp"
         try:
-            import subprocess
-
-            # Novo arquivo com compressão máxima usando OGG Vorbis
-            compressed_path = os.path.join(self.temp_dir, f"{unique_id}_emergency.ogg")
 
             # Comando ffmpeg para compressão extrema com Vorbis
             cmd = [
-                'ffmpeg', '-y',  # Forçar overwrite
+                'ffmpeg', '-hide_banner', '-v', 'error', '-y',  # Só erros no stderr; forçar overwrite
                 '-i', audio_path,
                 '-vn',  # Sem vídeo
                 '-map_metadata', '-1',  # Remover metadados
@@ -431,64 +1089,58 @@ class YouTubeService:
                 '-ar', '12000',  # Sample rate muito baixo (12kHz)
                 '-c:a', 'libvorbis',
                 '-q:a', '-1',  # Qualidade mínima (~32kbps)
-                '-af', 'atempo=2.5',  # Acelerar ainda mais (2.5x)
-                compressed_path
+                '-af', tempo_filter,  # Acelerar ainda mais (2.5x)
+                '-f', 'ogg', tmp_path  # Muxer explícito (extensão .tmp)
             ]
 
             logger.info("🚨 Executando compressão de emergência...")
             result = await asyncio.create_subprocess_exec(
                 *cmd,
-                stdout=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.DEVNULL,  # Saída vai para arquivo
                 stderr=asyncio.subprocess.PIPE
             )
 
-            stdout, stderr = await result.communicate()
+            _, stderr = await result.communicate()
 
             if result.returncode != 0:
                 logger.error(f"❌ Erro na compressão de emergência: {stderr.decode()}")
                 return audio_path  # Retorna o original
 
-            # Remover arquivo original
-            if os.path.exists(audio_path):
-                os.remove(audio_path)
-
+            await asyncio.to_thread(self._commit_compressed, tmp_path, compressed_path, audio_path)
             return compressed_path
 
         except Exception as e:
             logger.error(f"❌ Falha na compressão de emergência: {e}")
             return audio_path  # Retorna o original em caso de erro
+        finally:
+            await asyncio.to_thread(self._unlink_quietly, tmp_path)
+
+    def _commit_compressed(self, tmp_path: str, compressed_path: str, audio_path: str):
+        """Publica a saída do ffmpeg (rename atômico) e só então remove a entrada"""
+        os.replace(tmp_path, compressed_path)
+        self._unlink_quietly(audio_path)
 
     async def _final_retry_download(self, video_url: str) -> Tuple[str, str]:
         """
         Tentativa final após refresh da sessão
         """
+        unique_id = secrets.token_hex(4)
         try:
             # Usar compressão máxima na tentativa final
             enable_compression, speed_up = True, True
-            unique_id = str(uuid.uuid4())[:8]
-            final_audio_path = os.path.join(self.temp_dir, f"{unique_id}.mp3")
+            final_audio_path = os.path.join(self._work_dir(unique_id), f"{unique_id}.*")
             ydl_opts = self._get_yt_dlp_options(unique_id, "stealth", enable_compression, speed_up)
             
             logger.info(f"🔄 Tentativa final de download: {video_url}")
             
-            loop = asyncio.get_event_loop()
-            info_dict = await loop.run_in_executor(
-                None, 
-                self._download_with_ytdlp, 
-                video_url, 
-                ydl_opts
-            )
+            download = await self._submit_download(video_url, ydl_opts, "stealth", unique_id)
+            info_dict, downloaded_path, _ = await download
             
             video_title = info_dict.get('title', 'Título não encontrado')
             
-            if not os.path.exists(final_audio_path):
-                for file in os.listdir(self.temp_dir):
-                    if file.startswith(unique_id):
-                        final_audio_path = os.path.join(self.temp_dir, file)
-                        break
-                        
-                if not os.path.exists(final_audio_path):
-                    raise Exception(f"Arquivo não criado na tentativa final: {final_audio_path}")
+            if downloaded_path is None:
+                raise YTDLStrategyError(f"Arquivo não criado na tentativa final: {final_audio_path}")
+            final_audio_path = downloaded_path
             
             # Aplicar compressão pós-download na tentativa final
             if enable_compression or speed_up:
@@ -497,43 +1149,137 @@ class YouTubeService:
                     final_audio_path, unique_id, enable_compression, speed_up
                 )
 
-            file_size = os.path.getsize(final_audio_path) / (1024 * 1024)
+            file_size = await asyncio.to_thread(os.path.getsize, final_audio_path) / (1024 * 1024)
             logger.info(f"✅ Tentativa final bem-sucedida: '{video_title}' ({file_size:.2f}MB)")
 
+            final_audio_path = await asyncio.to_thread(self._finalize_download, final_audio_path, unique_id)
             return final_audio_path, video_title
             
         except Exception as e:
             logger.error(f"❌ Falha na tentativa final: {e}")
-            raise Exception(f"Falha na tentativa final: {e}")
+            await asyncio.to_thread(self._discard_download, unique_id)
+            raise YTDLStrategyError(f"Falha na tentativa final: {e}") from e
 
-    def _download_with_ytdlp(self, video_url: str, ydl_opts: dict) -> dict:
+    def _download_with_ytdlp(self, video_url: str, ydl_opts: dict, strategy: str, unique_id: str,
+                             cancel_event: Optional[threading.Event] = None) -> Tuple[dict, Optional[str], int]:
         """
         Execução síncrona do download
+
+        Localiza e mede o arquivo ainda na thread, sem stat no event loop.
+
+        Returns:
+            Tuple[dict, Optional[str], int]: (info_dict, caminho_do_audio, tamanho_em_bytes)
+
+        Raises:
+            yt_dlp.utils.DownloadCancelled: Se cancel_event for definido
         """
+        # Tentativa descartada enquanto aguardava na fila do executor
+        if cancel_event is not None and cancel_event.is_set():
+            raise yt_dlp.utils.DownloadCancelled("Tentativa de download descartada")
+
+        # Exceções sobem direto: _attempt_download já registra o erro
+        ydl = self._get_ydl(strategy, ydl_opts, cancel_event)
+        info_dict = ydl.extract_info(video_url, download=True)
+        filepath = self._resolve_downloaded_file(info_dict, unique_id, ydl)
+        size_bytes = os.stat(filepath).st_size if filepath else 0
+        return info_dict, filepath, size_bytes
+
+    def _get_ydl(self, strategy: str, ydl_opts: dict,
+                 cancel_event: Optional[threading.Event] = None) -> yt_dlp.YoutubeDL:
+        """
+        Retorna a instância YoutubeDL da thread atual para a estratégia
+
+        Sem o context manager: __exit__ fecharia o opener HTTP. A instância é
+        recriada quando o cookies.txt muda (refresh da sessão do navegador).
+        """
+        cookiefile = ydl_opts.get('cookiefile')
         try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                return ydl.extract_info(video_url, download=True)
+            cookies_mtime = os.stat(cookiefile).st_mtime_ns if cookiefile else None
+        except OSError:
+            cookies_mtime = None
+
+        cache = getattr(self._ydl_local, 'cache', None)
+        if cache is None:
+            cache = self._ydl_local.cache = {}
+
+        cached = cache.get(strategy)
+        if cached is not None and cached[0] == cookies_mtime:
+            ydl, cancel_slot = cached[1], cached[2]
+        else:
+            if cached is not None:
+                self._close_ydl(cached[1])
+            # auto_init=False: registra só os extractors do YouTube em vez de
+            # carregar a lista completa (centenas de sites) a cada instância
+            ydl = yt_dlp.YoutubeDL(ydl_opts, auto_init=False)
+            for ie_key in YTDLP_EXTRACTORS:
+                ydl.get_info_extractor(ie_key)
+            # Hook consulta o evento do download atual (também chamado pelas
+            # threads de fragmentos do yt-dlp, por isso não usa threading.local)
+            cancel_slot = {'event': None}
+            ydl.add_progress_hook(lambda _status, slot=cancel_slot: self._check_download_cancelled(slot['event']))
+            cache[strategy] = (cookies_mtime, ydl, cancel_slot)
+            with self._ydl_instances_lock:
+                self._ydl_instances.append(ydl)
+
+        # Parâmetros que mudam entre downloads da mesma estratégia
+        ydl.params['outtmpl'] = {'default': ydl_opts['outtmpl']}
+        cancel_slot['event'] = cancel_event
+        return ydl
+
+    @staticmethod
+    def _check_download_cancelled(cancel_event: Optional[threading.Event]):
+        """Progress hook: interrompe o yt-dlp se a tentativa foi descartada"""
+        if cancel_event is not None and cancel_event.is_set():
+            raise yt_dlp.utils.DownloadCancelled("Tentativa de download descartada")
+
+    def _close_ydl(self, ydl: yt_dlp.YoutubeDL):
+        """Fecha instância YoutubeDL sem regravar o cookies.txt (mantido pelo navegador)"""
+        try:
+            ydl.params.pop('cookiefile', None)
+            ydl.close()
         except Exception as e:
-            # Log adicional para debug
-            logger.debug(f"yt-dlp error details: {e}")
-            raise
+            logger.debug(f"Erro ao fechar YoutubeDL: {e}")
+        with self._ydl_instances_lock:
+            if ydl in self._ydl_instances:
+                self._ydl_instances.remove(ydl)
 
     def get_download_stats(self) -> Dict:
         """Retorna estatísticas de download"""
         return {
             "total_downloads": self.download_count,
             "temp_directory": self.temp_dir,
-            "cookies_available": os.path.exists(self.cookies_path),
+            "cookies_available": self._cookies_available(),
             "session_manager_active": self.session_manager is not None,
             "last_download_time": self.last_download_time
         }
 
+    async def aclose(self):
+        """Encerra as tarefas em background (executar no event loop)"""
+        task, self._janitor_task = self._janitor_task, None
+        if task is not None and not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
     def cleanup_temp_directory(self):
         """Remove diretório temporário"""
         try:
-            import shutil
+            with self._ydl_instances_lock:
+                instances, self._ydl_instances = self._ydl_instances, []
+            for ydl in instances:
+                self._close_ydl(ydl)
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+            # Rede de segurança: os áudios já são liberados após o consumo,
+            # aqui só sobram restos. Remoção arquivo a arquivo para que uma
+            # falha isolada não interrompa a limpeza
             if os.path.exists(self.temp_dir):
-                shutil.rmtree(self.temp_dir)
+                with os.scandir(self.temp_dir) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            shutil.rmtree(entry.path, ignore_errors=True)
+                        else:
+                            self._unlink_quietly(entry.path)
+                os.rmdir(self.temp_dir)
                 logger.info(f"🗑️ Diretório temporário removido: {self.temp_dir}")
         except Exception as e:
             logger.warning(f"⚠️ Erro ao limpar diretório temporário: {e}")
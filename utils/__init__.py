@@ -7,10 +7,35 @@ Inclui utilitários para validação, formatação e operações comuns.
 
 import os
 import re
+import string
+import time
 import asyncio
+import threading
+from functools import lru_cache
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any
-from pathlib import Path
+from typing import Optional, List, Dict, Any, Iterable
+
+# Padrões compilados uma única vez (usados a cada validação de URL/nome)
+# Uma única alternação: watch?v= (em qualquer posição da query), youtu.be e embed.
+# Quantificadores preguiçosos: com vários v= na query vale o primeiro
+_YT_RE = re.compile(r'(?:youtube\.com/watch\?(?:\S*?&)??v=|youtu\.be/|youtube\.com/embed/)([a-zA-Z0-9_-]{11})')
+# Caminho rápido sem regex para as formas canônicas: marcador + 11 caracteres
+# validados com bytes.translate (remove os inválidos; ID ok se nada sumir)
+_YT_MARKERS = ('youtube.com/watch?v=', 'youtu.be/', 'youtube.com/embed/')
+_YT_ID_BAD = bytes(
+    c for c in range(256)
+    if chr(c) not in string.ascii_letters + string.digits + '_-'
+)
+# Remoção de caracteres inválidos via str.translate (tabela em C, sem regex)
+_FN_DELETE = str.maketrans('', '', '<>:"/\\|?*')
+_FN_WS = re.compile(r'\s+')
+
+_SIZE_NAMES = ("B", "KB", "MB", "GB", "TB")
+
+# Diretórios já garantidos por ensure_directory_exists (limitado em tamanho)
+_ENSURED_DIRS: set = set()
+_ENSURED_LOCK = threading.Lock()
+_MAX_ENSURED_DIRS = 1024
 
 def format_file_size(size_bytes: int) -> str:
     """
@@ -25,13 +50,10 @@ def format_file_size(size_bytes: int) -> str:
     if size_bytes == 0:
         return "0 B"
     
-    size_names = ["B", "KB", "MB", "GB", "TB"]
-    i = 0
-    while size_bytes >= 1024 and i < len(size_names) - 1:
-        size_bytes /= 1024.0
-        i += 1
+    # Unidade direto pelo número de bits (cada unidade = 10 bits), sem laço
+    i = min(max(0, (int(size_bytes).bit_length() - 1) // 10), len(_SIZE_NAMES) - 1)
     
-    return f"{size_bytes:.1f} {size_names[i]}"
+    return f"{size_bytes / (1 << (10 * i)):.1f} {_SIZE_NAMES[i]}"
 
 def format_duration(seconds: float) -> str:
     """
@@ -45,18 +67,21 @@ def format_duration(seconds: float) -> str:
     """
     if seconds < 60:
         return f"{seconds:.1f}s"
-    elif seconds < 3600:
-        minutes = int(seconds // 60)
-        secs = int(seconds % 60)
-        return f"{minutes}m {secs}s"
-    else:
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
+
+    # Horas, minutos e segundos inteiros com dois divmod
+    hours, rem = divmod(int(seconds), 3600)
+    minutes, secs = divmod(rem, 60)
+    if hours:
         return f"{hours}h {minutes}m"
+    return f"{minutes}m {secs}s"
 
+@lru_cache(maxsize=4096)
 def extract_youtube_id(url: str) -> Optional[str]:
     """
     Extrai ID do vídeo de uma URL do YouTube
+
+    Resultado em cache LRU (por processo): URLs repetidas em retries e
+    coalescência de downloads não passam de novo pela regex
     
     Args:
         url: URL do YouTube
@@ -64,18 +89,58 @@ def extract_youtube_id(url: str) -> Optional[str]:
     Returns:
         Optional[str]: ID do vídeo ou None se inválido
     """
-    patterns = [
-        r'(?:youtube\.com/watch\?v=|youtu\.be/|youtube\.com/embed/)([a-zA-Z0-9_-]{11})',
-        r'youtube\.com/watch\?.*v=([a-zA-Z0-9_-]{11})',
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, url)
-        if match:
-            return match.group(1)
+    # Pré-filtro barato: sem "youtu" nenhuma das formas aceitas casa
+    if 'youtu' not in url:
+        return None
+
+    video_id = _fast_youtube_id(url)
+    if video_id is not None:
+        return video_id
+
+    match = _YT_RE.search(url)
+    return match.group(1) if match else None
+
+def _fast_youtube_id(url: str) -> Optional[str]:
+    """
+    Extrai o ID das formas canônicas de URL sem passar pela regex
     
+    Args:
+        url: URL do YouTube
+        
+    Returns:
+        Optional[str]: ID do vídeo ou None se a URL exigir a regex
+    """
+    pos, marker = min(
+        ((url.find(m), m) for m in _YT_MARKERS if m in url),
+        default=(-1, None)
+    )
+    # Um "watch?" anterior (ex.: watch?list=...&v=) casaria antes na regex
+    watch = url.find('youtube.com/watch?')
+    if pos < 0 or (watch != -1 and watch != pos):
+        return None
+
+    start = pos + len(marker)
+    candidate = url[start:start + 11]
+    raw = candidate.encode('ascii', 'ignore')
+    if len(raw) == 11 and len(raw.translate(None, _YT_ID_BAD)) == 11:
+        return candidate
     return None
 
+def extract_youtube_ids_batch(urls: List[str]) -> List[Optional[str]]:
+    """
+    Extrai os IDs de vários vídeos do YouTube de uma vez
+    
+    Args:
+        urls: URLs do YouTube
+        
+    Returns:
+        List[Optional[str]]: ID de cada URL (None se inválida), na mesma ordem
+    """
+    search = _YT_RE.search
+    matches = (search(url) if 'youtu' in url else None for url in urls)
+    return [match.group(1) if match else None for match in matches]
+
+@lru_cache(maxsize=4096)
 def validate_youtube_url(url: str) -> bool:
     """
     Valida se URL é do YouTube
@@ -86,7 +151,8 @@ def validate_youtube_url(url: str) -> bool:
     Returns:
         bool: True se válida
     """
-    return extract_youtube_id(url) is not None
+    # Só testa o casamento, sem extrair o grupo do ID
+    return 'youtu' in url and _YT_RE.search(url) is not None
 
 def clean_filename(filename: str) -> str:
     """
@@ -99,9 +165,9 @@ def clean_filename(filename: str) -> str:
         str: Nome limpo
     """
     # Remover caracteres especiais
-    filename = re.sub(r'[<>:"/\\|?*]', '', filename)
+    filename = filename.translate(_FN_DELETE)
     # Remover espaços extras
-    filename = re.sub(r'\s+', ' ', filename).strip()
+    filename = _FN_WS.sub(' ', filename).strip()
     # Limitar tamanho
     if len(filename) > 100:
         filename = filename[:97] + "..."
@@ -111,6 +177,9 @@ def clean_filename(filename: str) -> str:
 def ensure_directory_exists(path: str) -> bool:
     """
     Garante que diretório existe
+
+    Caminhos já verificados não são checados de novo no disco (supõe que
+    diretórios da aplicação não são removidos durante a execução)
     
     Args:
         path: Caminho do diretório
@@ -118,12 +187,20 @@ def ensure_directory_exists(path: str) -> bool:
     Returns:
         bool: True se criado/existe
     """
-    try:
-        Path(path).mkdir(parents=True, exist_ok=True)
+    if path in _ENSURED_DIRS:
         return True
+
+    try:
+        os.makedirs(path, exist_ok=True)
     except Exception:
         return False
 
+    with _ENSURED_LOCK:
+        if len(_ENSURED_DIRS) >= _MAX_ENSURED_DIRS:
+            _ENSURED_DIRS.clear()
+        _ENSURED_DIRS.add(path)
+    return True
+
 def get_client_ip(request) -> str:
     """
     Extrai IP real do cliente considerando proxies
@@ -134,17 +211,26 @@ def get_client_ip(request) -> str:
     Returns:
         str: IP do cliente
     """
-    # Verificar headers de proxy
-    forwarded_for = request.headers.get("X-Forwarded-For")
+    # Verificar headers de proxy numa única passada pelos headers crus do
+    # ASGI (nomes já em minúsculas), sem montar o objeto Headers
+    forwarded_for = real_ip = None
+    for name, value in request.scope["headers"]:
+        if name == b"x-forwarded-for" and value:
+            forwarded_for = value
+            break
+        if name == b"x-real-ip" and real_ip is None:
+            real_ip = value
+
     if forwarded_for:
-        return forwarded_for.split(",")[0].strip()
+        # Só o primeiro IP interessa: partition não monta a lista inteira
+        return forwarded_for.partition(b",")[0].strip().decode("latin-1")
     
-    real_ip = request.headers.get("X-Real-IP")
     if real_ip:
-        return real_ip
+        return real_ip.decode("latin-1")
     
     # Fallback para IP direto
-    return request.client.host if request.client else "unknown"
+    client = request.scope.get("client")
+    return client[0] if client else "unknown"
 
 def truncate_text(text: str, max_length: int = 100, suffix: str = "...") -> str:
     """
@@ -161,24 +247,21 @@ def truncate_text(text: str, max_length: int = 100, suffix: str = "...") -> str:
     if len(text) <= max_length:
         return text
     
-    # Truncar e encontrar última palavra completa
-    truncated = text[:max_length - len(suffix)]
-    last_space = truncated.rfind(' ')
+    # Encontrar última palavra completa direto no texto original (um só corte)
+    end = max_length - len(suffix)
+    last_space = text.rfind(' ', 0, end)
     
-    if last_space > 0:
-        truncated = truncated[:last_space]
-    
-    return truncated + suffix
+    return text[:last_space if last_space > 0 else end] + suffix
 
 def calculate_estimated_time(items_processed: int, total_items: int, 
-                           start_time: datetime) -> Optional[str]:
+                           start_time: float) -> Optional[str]:
     """
     Calcula tempo estimado de conclusão
     
     Args:
         items_processed: Itens já processados
         total_items: Total de itens
-        start_time: Hora de início
+        start_time: Início, obtido com time.monotonic()
         
     Returns:
         Optional[str]: Tempo estimado ou None
@@ -186,8 +269,10 @@ def calculate_estimated_time(items_processed: int, total_items: int,
     if items_processed == 0:
         return None
     
-    elapsed = datetime.now() - start_time
-    rate = items_processed / elapsed.total_seconds()
+    elapsed = time.monotonic() - start_time
+    if elapsed <= 0:
+        return None
+    rate = items_processed / elapsed
     
     if rate <= 0:
         return None
@@ -197,19 +282,37 @@ def calculate_estimated_time(items_processed: int, total_items: int,
     
     return format_duration(estimated_seconds)
 
+def calculate_estimated_time_dt(items_processed: int, total_items: int,
+                              start_time: datetime) -> Optional[str]:
+    """
+    Variante de calculate_estimated_time para quem ainda usa datetime
+    
+    Args:
+        items_processed: Itens já processados
+        total_items: Total de itens
+        start_time: Hora de início (datetime.now())
+        
+    Returns:
+        Optional[str]: Tempo estimado ou None
+    """
+    elapsed = (datetime.now() - start_time).total_seconds()
+    return calculate_estimated_time(items_processed, total_items, time.monotonic() - elapsed)
+
 def create_safe_dict(data: Dict[str, Any], 
-                    safe_keys: List[str]) -> Dict[str, Any]:
+                    safe_keys: Iterable[str]) -> Dict[str, Any]:
     """
     Cria dicionário apenas com chaves seguras
     
     Args:
         data: Dicionário original
-        safe_keys: Chaves permitidas
+        safe_keys: Chaves permitidas (passe um frozenset para evitar a conversão)
         
     Returns:
         Dict[str, Any]: Dicionário filtrado
     """
-    return {key: data[key] for key in safe_keys if key in data}
+    keys = safe_keys if isinstance(safe_keys, (set, frozenset)) else frozenset(safe_keys)
+    # Interseção feita em C: só as chaves presentes chegam ao __getitem__
+    return {key: data[key] for key in data.keys() & keys}
 
 async def run_with_timeout(coro, timeout_seconds: float):
     """
@@ -225,7 +328,10 @@ async def run_with_timeout(coro, timeout_seconds: float):
     Raises:
         asyncio.TimeoutError: Se timeout
     """
-    return await asyncio.wait_for(coro, timeout=timeout_seconds)
+    # asyncio.timeout (Python 3.11+) aguarda a corrotina na própria task,
+    # sem a task extra criada pelo wait_for
+    async with asyncio.timeout(timeout_seconds):
+        return await coro
 
 def mask_sensitive_data(data: str, mask_char: str = "*", 
                        show_chars: int = 4) -> str:
@@ -240,34 +346,35 @@ def mask_sensitive_data(data: str, mask_char: str = "*",
     Returns:
         str: Dados mascarados
     """
-    if len(data) <= show_chars * 2:
-        return mask_char * len(data)
-    
-    start = data[:show_chars]
-    end = data[-show_chars:]
-    middle = mask_char * (len(data) - show_chars * 2)
+    n = len(data)
+    if n <= show_chars * 2:
+        return mask_char * n
     
-    return f"{start}{middle}{end}"
+    return f"{data[:show_chars]}{mask_char * (n - show_chars * 2)}{data[-show_chars:]}"
 
 # Constantes úteis
 MAX_FILE_SIZE = 25 * 1024 * 1024  # 25MB
-SUPPORTED_AUDIO_FORMATS = ['.mp3', '.wav', '.m4a', '.aac', '.ogg']
+SUPPORTED_AUDIO_FORMATS_TUPLE = ('.mp3', '.wav', '.m4a', '.aac', '.ogg')  # Ordem estável (logs)
+SUPPORTED_AUDIO_FORMATS = frozenset(SUPPORTED_AUDIO_FORMATS_TUPLE)  # Busca O(1) por extensão
 DEFAULT_TIMEOUT = 300  # 5 minutos
 
 __all__ = [
     "format_file_size",
     "format_duration", 
     "extract_youtube_id",
+    "extract_youtube_ids_batch",
     "validate_youtube_url",
     "clean_filename",
     "ensure_directory_exists",
     "get_client_ip",
     "truncate_text",
     "calculate_estimated_time",
+    "calculate_estimated_time_dt",
     "create_safe_dict",
     "run_with_timeout",
     "mask_sensitive_data",
     "MAX_FILE_SIZE",
     "SUPPORTED_AUDIO_FORMATS",
+    "SUPPORTED_AUDIO_FORMATS_TUPLE",
     "DEFAULT_TIMEOUT"
 ]